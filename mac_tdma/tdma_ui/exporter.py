@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
+import ctypes
+import os
 import re
+import select
 import time
 from collections import deque
 from prometheus_client import start_http_server
@@ -11,6 +14,10 @@ LOG_FILE = "/logs/master_output.txt"
 
 BURST_SIZE = 50
 
+READ_SIZE         = 1024 * 1024  # max bytes drained from the log per read
+POLL_INTERVAL_S   = 0.05         # tail loop sleep when inotify is unavailable
+INOTIFY_TIMEOUT_S = 1.0          # re-read even without an event (e.g. network mounts)
+
 # -------------------------------------------------
 # Metrics
 # -------------------------------------------------
@@ -82,8 +89,9 @@ seq_queue = deque()
 # Regex
 # -------------------------------------------------
 
+# same grammar as tdma_ui_raspi/tdma_lines.py (Temp is signed)
 PDC_LINE_RE = re.compile(
-    r"PDC\s+([\d.]+)\s+Seq:(\d+)\s+Tx:(\d+)\s+Temp:(\d+)"
+    r"PDC\s+([\d.]+)\s+Seq:(\d+)\s+Tx:(\d+)\s+Temp:(-?\d+)"
 )
 
 BEACON_RE = re.compile(
@@ -94,17 +102,74 @@ BEACON_RE = re.compile(
 # Tail file
 # -------------------------------------------------
 
+class Inotify:
+    """Minimal inotify watch on one file through libc (Linux only)."""
+
+    IN_MODIFY      = 0x002
+    IN_ATTRIB      = 0x004
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF   = 0x800
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_DELETE_SELF | self.IN_MOVE_SELF
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout):
+        """Block until the file changes or timeout seconds pass; drain queued events."""
+        if select.select([self.fd], [], [], timeout)[0]:
+            try:
+                os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+
 def follow(file):
+    """
+    Yield lists of complete lines appended to file (opened in binary mode).
+
+    Sleeps on inotify until the log is written to (polling every
+    POLL_INTERVAL_S where inotify is unavailable), then drains everything
+    appended since in one read and splits it into lines in bulk. A partial
+    last line is held back until its newline arrives.
+    """
     file.seek(0, 2)
 
-    while True:
-        line = file.readline()
+    try:
+        watcher = Inotify(file.name)
+    except (OSError, AttributeError):
+        watcher = None
+
+    tail = b""
+    try:
+        while True:
+            chunk = file.read(READ_SIZE)
 
-        if not line:
-            time.sleep(0.05)
-            continue
+            if not chunk:
+                if watcher is not None:
+                    watcher.wait(INOTIFY_TIMEOUT_S)
+                else:
+                    time.sleep(POLL_INTERVAL_S)
+                continue
 
-        yield line
+            chunk = tail + chunk
+            cut   = chunk.rfind(b"\n") + 1
+            tail  = chunk[cut:]
+            if cut:
+                yield chunk[:cut].decode(errors="replace").splitlines()
+    finally:
+        if watcher is not None:
+            watcher.close()
 
 # -------------------------------------------------
 # Helpers
@@ -130,64 +195,74 @@ def close_burst(tx_id):
     )
 
 # -------------------------------------------------
-# Main parser
+# Line handling
 # -------------------------------------------------
-def main():
-    print("Starting Prometheus exporter on :8000")
-    start_http_server(8000)
-
-    with open(LOG_FILE, "r") as f:
-        for line in follow(f):
-            line = line.strip()
 
-            # Beacon
-            m = BEACON_RE.search(line)
-            if m:
-                beacon_counter.inc()
-                print(f"Beacon @ {m.group(1)} ms")
-                continue
+def handle_line(line):
+    # cheap substring pre-filter: most log lines are neither beacons nor PDC
+    if "Beacon fired" not in line and "PDC" not in line:
+        return
+
+    # Beacon
+    m = BEACON_RE.search(line)
+    if m:
+        beacon_counter.inc()
+        print(f"Beacon @ {m.group(1)} ms")
+        return
+
+    # Consolidated PDC line
+    m = PDC_LINE_RE.search(line)
+    if m:
+        frame_time  = float(m.group(1))
+        current_seq = int(m.group(2))
+        tx_id       = m.group(3)   # keep as str for label consistency
+        temp        = int(m.group(4))
+
+        # --- Inter-message timing ---
+        delta = None
+        if tx_id in last_message_time:
+            delta = frame_time - last_message_time[tx_id]
+            inter_message_gauge.labels(tx_id=tx_id).set(delta)
+        last_message_time[tx_id] = frame_time
+
+        # --- Burst tracking by seq number per tx_id ---
+        if tx_id not in current_burst_seq:
+            current_burst_seq[tx_id] = current_seq
+            burst_received[tx_id]    = 1
+        elif current_seq != current_burst_seq[tx_id]:
+            close_burst(tx_id)
+            current_burst_seq[tx_id] = current_seq
+            burst_received[tx_id]    = 1
+        else:
+            burst_received[tx_id] = burst_received.get(tx_id, 0) + 1
+
+        # --- Other metrics ---
+        packet_counter.labels(tx_id=tx_id).inc()
+        temperature_gauge.labels(tx_id=tx_id).set(temp)
+        seq_gauge.labels(tx_id=tx_id).set(current_seq)
+        frame_time_gauge.labels(tx_id=tx_id).set(frame_time)
+
+        print(
+            f"TX={tx_id} SEQ={current_seq} TEMP={temp} "
+            f"DT={f'{delta:.3f}ms' if delta is not None else 'n/a'} "
+            f"burst_rx={burst_received.get(tx_id, 0)}"
+        )
+        return
+
+    # unmatched lines (e.g. bare "PDC ...") fall through silently
 
-            # Consolidated PDC line
-            m = PDC_LINE_RE.search(line)
-            if m:
-                frame_time  = float(m.group(1))
-                current_seq = int(m.group(2))
-                tx_id       = m.group(3)   # keep as str for label consistency
-                temp        = int(m.group(4))
-
-                # --- Inter-message timing ---
-                delta = None
-                if tx_id in last_message_time:
-                    delta = frame_time - last_message_time[tx_id]
-                    inter_message_gauge.labels(tx_id=tx_id).set(delta)
-                last_message_time[tx_id] = frame_time
-
-                # --- Burst tracking by seq number per tx_id ---
-                if tx_id not in current_burst_seq:
-                    current_burst_seq[tx_id] = current_seq
-                    burst_received[tx_id]    = 1
-                elif current_seq != current_burst_seq[tx_id]:
-                    close_burst(tx_id)
-                    current_burst_seq[tx_id] = current_seq
-                    burst_received[tx_id]    = 1
-                else:
-                    burst_received[tx_id] = burst_received.get(tx_id, 0) + 1
-
-                # --- Other metrics ---
-                packet_counter.labels(tx_id=tx_id).inc()
-                temperature_gauge.labels(tx_id=tx_id).set(temp)
-                seq_gauge.labels(tx_id=tx_id).set(current_seq)
-                frame_time_gauge.labels(tx_id=tx_id).set(frame_time)
-
-                print(
-                    f"TX={tx_id} SEQ={current_seq} TEMP={temp} "
-                    f"DT={f'{delta:.3f}ms' if delta is not None else 'n/a'} "
-                    f"burst_rx={burst_received.get(tx_id, 0)}"
-                )
-                continue
+# -------------------------------------------------
+# Main loop
+# -------------------------------------------------
 
-            # unmatched lines (e.g. bare "PDC ...") fall through silently
+def main():
+    print("Starting Prometheus exporter on :8000")
+    start_http_server(8000)
 
+    with open(LOG_FILE, "rb", buffering=0) as f:
+        for lines in follow(f):
+            for line in lines:
+                handle_line(line)
 
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import re
 import numpy as np
+from array import array
 from pathlib import Path
 
 # ---- CONFIG ----
@@ -20,78 +21,80 @@ DOWNSAMPLE = 5         # vlines reduction factor
 OFFSET = 700          # wait for both clients to converge
 
 '''
+# same grammar as tdma_ui_raspi/tdma_lines.py (Temp is signed)
 PDC_LINE_RE = re.compile(
-    r"PDC\s+([\d.]+)\s+Seq:(\d+)\s+Tx:(\d+)\s+Temp:(\d+)"
+    r"PDC\s+([\d.]+)\s+Seq:(\d+)\s+Tx:(\d+)\s+Temp:(-?\d+)"
 )
 
 first_msg_time = None  # will be set to first PDC frame_time
 
-def parse_master_log(log_file):
-    if not Path(log_file).exists():
-        print(f"Error: {log_file} not found")
-        return []
+PDC_COLUMNS = ["frame_time", "beacon", "seq", "tx_id", "temperature"]
 
-    records = []
 
-    with open(log_file, "r") as f:
-        lines = f.readlines()
+def iter_master_log(log_file):
+    """
+    Stream PDC records out of the log, one line at a time.
 
-    # -------------------------------------------------
-    # Find first reference time (first PDC frame_time)
-    # -------------------------------------------------
+    Yields (frame_time, seq, tx_id, temperature) tuples. frame_time is rebased
+    on the first PDC line as soon as it is seen, so the file is read exactly
+    once and never held in memory.
+    """
     global first_msg_time
-    for raw_line in lines:
-        line = raw_line.strip()
-
-        if not line:
-            continue
-
-        m = PDC_LINE_RE.search(line)
-        if m:
-            first_msg_time = float(m.group(1))
-            break
-
-    # -------------------------------------------------
-    # Parse log — one PDC record per line now
-    # -------------------------------------------------
-    for raw_line in lines:
-        line = raw_line.strip()
+    first_msg_time = None
 
-        if not line:
-            continue
-
-        # Beacon
-        m = re.search(
-            r"Beacon TX callback fired:\s*frame_time=([\d.]+)\s*ms",
-            line
-        )
-        
-
-        # PDC data (single consolidated line: PDC <time> Seq:<n> Tx:<n> Temp:<n>)
-        m = PDC_LINE_RE.search(line)
-        if m:
-            records.append({
-                "frame_time": float(m.group(1)) - first_msg_time,
-                "beacon": False,
-                "seq": int(m.group(2)),
-                "tx_id": int(m.group(3)),
-                "temperature": int(m.group(4)),
-            })
-            continue
-
-        # anything else (e.g. bare "PDC 50860.737052" with no Seq/Tx/Temp) is skipped
+    with open(log_file, "r") as f:
+        for line in f:
+            # PDC data (single consolidated line: PDC <time> Seq:<n> Tx:<n> Temp:<n>)
+            m = PDC_LINE_RE.search(line)
+            if not m:
+                # anything else (e.g. bare "PDC 50860.737052" with no Seq/Tx/Temp) is skipped
+                continue
+
+            frame_time = float(m.group(1))
+            if first_msg_time is None:
+                first_msg_time = frame_time
+
+            yield (
+                frame_time - first_msg_time,
+                int(m.group(2)),
+                int(m.group(3)),
+                int(m.group(4)),
+            )
 
-    return records
 
-def save_to_csv(records, csv_file):
-    if not records:
+def parse_master_log(log_file):
+    if not Path(log_file).exists():
+        print(f"Error: {log_file} not found")
+        return pd.DataFrame(columns=PDC_COLUMNS)
+
+    # typed columns instead of one dict per record
+    frame_time = array("d")
+    seq = array("q")
+    tx_id = array("q")
+    temperature = array("q")
+
+    for t, s, tx, temp in iter_master_log(log_file):
+        frame_time.append(t)
+        seq.append(s)
+        tx_id.append(tx)
+        temperature.append(temp)
+
+    return pd.DataFrame({
+        "frame_time": np.frombuffer(frame_time, dtype=np.float64),
+        "beacon": np.zeros(len(frame_time), dtype=bool),
+        "seq": np.frombuffer(seq, dtype=np.int64),
+        "tx_id": np.frombuffer(tx_id, dtype=np.int64),
+        "temperature": np.frombuffer(temperature, dtype=np.int64),
+    })
+
+def save_to_csv(df, csv_file):
+    if df.empty:
         print("No records to save")
         return False
 
-    df = pd.DataFrame(records)
     df.to_csv(csv_file, index=False)
 
-    print(f"Saved {len(records)} records to {csv_file}")
+    print(f"Saved {len(df)} records to {csv_file}")
     return True
 
 
@@ -410,21 +413,19 @@ def print_seq_stats(df):
 def main():
     print(f"Parsing {MASTER_LOG_FILE}...")
 
-    records = parse_master_log(MASTER_LOG_FILE)
+    df = parse_master_log(MASTER_LOG_FILE)
 
-    if not records:
+    if df.empty:
         print("No records found")
         return
 
-    df = pd.DataFrame(records)
-
-    print(f"Found {len(records)} TDMA events")
+    print(f"Found {len(df)} TDMA events")
 
     print_seq_stats(df)
 
     print(f"Saving CSV -> {CSV_FILE}")
 
-    if save_to_csv(records, CSV_FILE):
+    if save_to_csv(df, CSV_FILE):
         print("Generating plot...")
         plot_tdma_timeline(CSV_FILE)
         print("Done")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark metrics.py burst accounting against the number of TXs.
+
+Simulates a cluster of N PTs, each sending bursts of EXPECTED_BURST_SIZE
+packets 40 ms apart with its own Seq counter (so Seq numbers collide across
+TXs), drops a few percent of packets, and feeds the same total number of
+packets through OnlineDetector and analyze_bursts(fit=False) for every N. Per-packet
+cost should stay flat as N grows; open bursts (the detector's memory) grow
+only with N.
+
+Usage:
+    python3 bench_metrics.py [--packets 200000] [--tx 1 10 50 100 250 500]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from tdma_log import PDC_DTYPE
+from metrics import (
+    EXPECTED_BURST_SIZE, INTRA_BURST_STEP_MS, OnlineDetector, analyze_bursts,
+)
+
+BURST_PERIOD_MS = 2000.0     # one burst per TX every TDMA iteration
+LOSS = 0.05                  # fraction of packets dropped
+CHUNK = 1000                 # packets per OnlineDetector.feed() call
+
+
+def simulate(n_tx, n_packets, seed=0):
+    """Return a PDC_DTYPE array of about n_packets packets from n_tx TXs, in log order."""
+    rng = np.random.default_rng(seed)
+    n_bursts = max(1, n_packets // (n_tx * EXPECTED_BURST_SIZE))
+
+    tx = np.repeat(np.arange(1, n_tx + 1), n_bursts * EXPECTED_BURST_SIZE)
+    burst = np.tile(np.repeat(np.arange(n_bursts), EXPECTED_BURST_SIZE), n_tx)
+    slot = np.tile(np.arange(EXPECTED_BURST_SIZE), n_tx * n_bursts)
+    phase = rng.uniform(0, BURST_PERIOD_MS, n_tx)[tx - 1]
+
+    rec = np.empty(len(tx), dtype=PDC_DTYPE)
+    rec['time'] = phase + burst * BURST_PERIOD_MS + slot * INTRA_BURST_STEP_MS
+    rec['seq'] = burst % 256     # the firmware's Seq is a uint8_t and wraps
+    rec['tx'] = tx
+    rec['temp'] = 30
+
+    rec = rec[rng.random(len(rec)) >= LOSS]
+    return rec[np.argsort(rec['time'], kind='stable')]
+
+
+def bench_online(packets):
+    detector = OnlineDetector()
+    peak_open = 0
+    start = time.perf_counter()
+    for i in range(0, len(packets), CHUNK):
+        detector.feed(packets[i:i + CHUNK])
+        peak_open = max(peak_open, len(detector.open))
+    detector.expire(force=True)
+    return time.perf_counter() - start, peak_open, detector.missing
+
+
+def bench_offline(packets):
+    start = time.perf_counter()
+    _, missing = analyze_bursts(packets, fit=False)
+    return time.perf_counter() - start, len(missing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark burst accounting against the number of TXs.")
+    parser.add_argument('--packets', type=int, default=200_000,
+                        help='Simulated packets per run (default: 200000)')
+    parser.add_argument('--tx', type=int, nargs='+', default=[1, 10, 50, 100, 250, 500],
+                        help='TX counts to simulate')
+    args = parser.parse_args()
+
+    print(f"{'TXs':>5} {'Packets':>8} {'Online ns/pkt':>14} {'Open bursts':>12} "
+          f"{'Offline ns/pkt':>15} {'Missing':>8}")
+    print("-" * 68)
+    for n_tx in args.tx:
+        packets = simulate(n_tx, args.packets)
+        online_s, peak_open, online_missing = bench_online(packets)
+        offline_s, offline_missing = bench_offline(packets)
+        assert online_missing == offline_missing, (online_missing, offline_missing)
+        print(f"{n_tx:>5} {len(packets):>8} {online_s * 1e9 / len(packets):>14.0f} {peak_open:>12} "
+              f"{offline_s * 1e9 / len(packets):>15.0f} {offline_missing:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,92 @@
-import re
+import argparse
+import csv
+import os
 
-# Match lines like:
-# PDC 729083.268 Seq:25 Tx:4 Temp:36
-pattern = re.compile(r"PDC\s+(\d+\.\d+)")
+import numpy as np
+
+from tdma_log import extract_pdc, iter_blocks, read_pdc, read_pdc_window
+from tdma_sketch import QUANTILES, IntervalStats
 
 EXPECTED_INTERVAL = 40.0
 TOLERANCE = 0.001  # Adjust if needed for floating-point comparisons
 
-def calculate_mismatches(log_file):
-    previous_time = None
+def calculate_mismatches(log_file, t_from=None, t_to=None):
+    # Times of every line like:
+    # PDC 729083.268 Seq:25 Tx:4 Temp:36
+    # optionally only those in [t_from, t_to], read through the time index
+    if t_from is None and t_to is None:
+        times = read_pdc(log_file)["time"]
+    else:
+        times = read_pdc_window(log_file, t_from, t_to)["time"]
+
+    deltas = np.diff(times)
+    mismatches = np.flatnonzero(np.abs(deltas - EXPECTED_INTERVAL) > TOLERANCE) + 1
+
     previous_mismatch_time = None
+    for i in mismatches:
+        current_time = times[i]
+        delta = deltas[i - 1]
 
-    with open(log_file, "r") as f:
-        for line in f:
-            match = pattern.search(line)
-            if not match:
-                continue
+        print(f"Mismatch at {current_time:.3f}: interval = {delta:.3f}s")
 
-            current_time = float(match.group(1))
+        if previous_mismatch_time is not None:
+            gap = current_time - previous_mismatch_time
+            print(f"    Time since previous mismatch: {gap:.3f}s")
 
-            if previous_time is not None:
-                delta = current_time - previous_time
+        previous_mismatch_time = current_time
 
-                if abs(delta - EXPECTED_INTERVAL) > TOLERANCE:
-                    print(f"Mismatch at {current_time:.3f}: interval = {delta:.3f}s")
 
-                    if previous_mismatch_time is not None:
-                        gap = current_time - previous_mismatch_time
-                        print(f"    Time since previous mismatch: {gap:.3f}s")
+def interval_stats(log_file, t_from=None, t_to=None, bursts_csv=None):
+    """
+    Per-TX interval and jitter percentiles (see tdma_sketch.IntervalStats).
+    The whole log is streamed block by block, so memory stays bounded;
+    bursts_csv gets one row of jitter percentiles per finished burst.
+    """
+    out = open(bursts_csv, "w", newline="") if bursts_csv else None
+    writer = csv.writer(out) if out else None
+    if writer:
+        writer.writerow(["tx", "seq", "intervals"] + [f"jitter_p{round(q * 100)}_ms" for q in QUANTILES])
 
-                    previous_mismatch_time = current_time
+    def on_burst(tx, seq, sketch):
+        if writer:
+            writer.writerow([tx, seq, sketch.count] + [round(sketch.quantile(q), 3) for q in QUANTILES])
 
-            previous_time = current_time
+    stats = IntervalStats(EXPECTED_INTERVAL, on_burst)
+    if os.path.isdir(log_file):
+        # exporter archive: already binary, read_archive() maps it
+        stats.feed(read_pdc_window(log_file, t_from, t_to))
+    elif t_from is None and t_to is None:
+        for block in iter_blocks(log_file):
+            stats.feed(extract_pdc(block))
+    else:
+        stats.feed(read_pdc_window(log_file, t_from, t_to))
+    stats.finish()
+
+    if out:
+        out.close()
+    return stats
 
 
 if __name__ == "__main__":
-    calculate_mismatches("logs/master_output.txt")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Report PDC intervals that differ from 40 ms.")
+    parser.add_argument("logfile", nargs="?", default="logs/master_output.txt")
+    parser.add_argument("--from", dest="t_from", type=float, default=None,
+                        help="Only check packets with frame_time >= this (ms)")
+    parser.add_argument("--to", dest="t_to", type=float, default=None,
+                        help="Only check packets with frame_time <= this (ms)")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print per-TX interval/jitter percentiles instead of every mismatch")
+    parser.add_argument("--bursts", default=None,
+                        help="With --stats, write per-burst jitter percentiles to this CSV")
+    parser.add_argument("--sketch-out", default=None,
+                        help="With --stats, save the sketches here for tdma_sketch.py to merge")
+    args = parser.parse_args()
+
+    if args.stats:
+        stats = interval_stats(args.logfile, args.t_from, args.t_to, args.bursts)
+        print(stats.report().to_string())
+        if args.sketch_out:
+            stats.save(args.sketch_out)
+            print(f"Saved sketches -> {args.sketch_out}")
+    else:
+        calculate_mismatches(args.logfile, args.t_from, args.t_to)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark the exporter's ingest path on a replayed log.
+
+Feeds an archived master_output.txt through Master.handle_line() and
+reports lines/s for two ways of publishing the metrics:
+
+  labels      per-line labelled Counter/Gauge updates, as the exporter did
+              before TdmaCollector (a .labels() lookup and a lock each)
+  collector   TdmaCollector: plain dict writes, families built at scrape time
+
+and the cost of one scrape of the resulting registry.
+
+With --live N it instead runs the exporter on N temporary logs, each fed a
+PDC line every 40 ms (25 packets/s) for --seconds, and reports the exporter
+process's CPU use and the packets it published per master.
+
+Usage:
+    python3 bench_exporter.py [logfile] [--repeat 20]
+    python3 bench_exporter.py --live 16 [--seconds 30]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, generate_latest
+
+import exporter
+
+DEFAULT_LOG = "../../tdma_ui/master_output.txt"
+
+
+def install_labelled_metrics(master):
+    """Re-create the old labelled metrics and update them on every packet of master, as before."""
+    reg = CollectorRegistry()
+    packet_counter = Counter("tdma_packets_total", "", ["tx_id"], registry=reg)
+    temperature_gauge = Gauge("tdma_temperature_celsius", "", ["tx_id"], registry=reg)
+    seq_gauge = Gauge("tdma_sequence", "", ["tx_id"], registry=reg)
+    frame_time_gauge = Gauge("tdma_frame_time_ms", "", ["tx_id"], registry=reg)
+    inter_message_gauge = Gauge("tdma_inter_message_mseconds", "", ["tx_id"], registry=reg)
+    burst_per_gauge = Gauge("tdma_burst_per", "", ["tx_id"], registry=reg)
+    cumulative_per_gauge = Gauge("tdma_cumulative_per", "", ["tx_id"], registry=reg)
+
+    window_index, close_burst = master.burst_window_index, master.close_burst
+
+    def labelled_window_index(tx_id, frame_time):
+        # called once per PDC packet, after the per-TX dicts are updated
+        if tx_id in master.last_delta:
+            inter_message_gauge.labels(tx_id=tx_id).set(master.last_delta[tx_id])
+        packet_counter.labels(tx_id=tx_id).inc()
+        temperature_gauge.labels(tx_id=tx_id).set(master.temperature[tx_id])
+        seq_gauge.labels(tx_id=tx_id).set(master.current_burst_seq.get(tx_id, 0))
+        frame_time_gauge.labels(tx_id=tx_id).set(frame_time)
+        return window_index(tx_id, frame_time)
+
+    def labelled_close_burst(tx_id, *args, **kwargs):
+        close_burst(tx_id, *args, **kwargs)
+        burst_per_gauge.labels(tx_id=tx_id).set(master.last_burst_per[tx_id])
+        cumulative_per_gauge.labels(tx_id=tx_id).set(
+            master.total_lost[tx_id] / master.total_expected[tx_id])
+
+    # handle_line() calls these through self, so instance attributes override them
+    master.burst_window_index = labelled_window_index
+    master.close_burst = labelled_close_burst
+    return reg
+
+
+def run(master, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            master.handle_line(line)
+    return len(lines) * repeat / (time.perf_counter() - start)
+
+
+def scrape_ms(registry):
+    start = time.perf_counter()
+    generate_latest(registry)
+    return (time.perf_counter() - start) * 1e3
+
+
+def live(n_logs, seconds, port=18000, rate_hz=25):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"master{i}.txt") for i in range(n_logs)]
+        for path in paths:
+            open(path, "w").close()
+        proc = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "exporter.py"),
+             *paths, "--port", str(port)],
+            stdout=subprocess.DEVNULL)
+        time.sleep(1.0)
+
+        logs = [open(path, "a") for path in paths]
+        clock_tick = os.sysconf("SC_CLK_TCK")
+
+        def cpu_s():
+            with open(f"/proc/{proc.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / clock_tick   # utime + stime
+
+        cpu0, start, sent = cpu_s(), time.monotonic(), 0
+        while time.monotonic() - start < seconds:
+            frame_time = sent * 1000.0 / rate_hz
+            for tx, f in enumerate(logs, 1):
+                f.write(f"PDC {frame_time:.3f} Seq:{sent // 50 + 1} Tx:{tx} Temp:30\n")
+                f.flush()
+            sent += 1
+            time.sleep(max(0.0, start + sent / rate_hz - time.monotonic()))
+        time.sleep(0.5)
+        cpu = cpu_s() - cpu0
+        elapsed = time.monotonic() - start
+
+        body = urllib.request.urlopen(f"http://localhost:{port}/metrics").read().decode()
+        published = sum(float(line.rsplit(" ", 1)[1]) for line in body.splitlines()
+                        if line.startswith("tdma_packets_total{"))
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(10)
+        for f in logs:
+            f.close()
+
+    print(f"{n_logs} logs x {rate_hz} packets/s for {elapsed:.0f} s: "
+          f"{sent * n_logs} lines written, {published:.0f} published")
+    print(f"Exporter CPU: {cpu:.2f} s ({100 * cpu / elapsed:.1f}% of one core)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the exporter ingest path on a replayed log.")
+    parser.add_argument("logfile", nargs="?", default=DEFAULT_LOG)
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the log per mode (default: 20)")
+    parser.add_argument("--live", type=int, metavar="N",
+                        help="Run the exporter on N live temporary logs instead")
+    parser.add_argument("--seconds", type=float, default=30, help="--live duration (default: 30)")
+    args = parser.parse_args()
+
+    if args.live:
+        live(args.live, args.seconds)
+        return
+
+    with open(args.logfile, "rb") as f:
+        lines = f.read().decode(errors="replace").splitlines()
+
+    master = exporter.Master("bench", args.logfile)
+    reg = install_labelled_metrics(master)
+    labelled = run(master, lines, args.repeat)
+    labelled_scrape = scrape_ms(reg)
+
+    master = exporter.Master("bench", args.logfile)
+    reg = CollectorRegistry()
+    reg.register(exporter.TdmaCollector([master]))
+    collector = run(master, lines, args.repeat)
+    collector_scrape = scrape_ms(reg)
+
+    print(f"{len(lines) * args.repeat} lines ({len(lines)} x {args.repeat}) from {args.logfile}")
+    print(f"{'Mode':<10} {'Lines/s':>10} {'Scrape ms':>10}")
+    print(f"{'labels':<10} {labelled:>10.0f} {labelled_scrape:>10.2f}")
+    print(f"{'collector':<10} {collector:>10.0f} {collector_scrape:>10.2f}")
+    print(f"Speed-up: {collector / labelled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
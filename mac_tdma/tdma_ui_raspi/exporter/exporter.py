@@ -1,132 +1,857 @@
-import re
+import argparse
+import asyncio
+import ctypes
+import itertools
+import json
+import logging
+import os
+import signal
+import struct
+import sys
 import time
-from prometheus_client import start_http_server, Gauge, Counter
+from bisect import bisect_left
+from pathlib import Path
+from prometheus_client import start_http_server
+from prometheus_client.core import (
+    REGISTRY, CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily,
+)
+from prometheus_client.utils import INF, floatToGoString
 
-LOG_FILE = "/logs/master_output.txt"
+# tdma_lines.py is shared with the analysis scripts one directory up; the
+# image copies it next to this file
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from tdma_lines import BEACON, COMPRESSED_SUFFIXES, PDC, is_compressed, open_log, parse_line  # noqa: E402
+
+LOG_FILE = "/logs/master_output.txt"    # default when no logs are given
+# written next to each log, on the /logs volume, so it survives container restarts
+CHECKPOINT_SUFFIX = ".exporter.json"
+PORT = 8000
 
 BURST_SIZE = 50
 BURST_DURATION_MS = 2000.0
 
-packet_counter = Counter("tdma_packets_total", "Total TDMA packets", ["tx_id"])
-temperature_gauge = Gauge("tdma_temperature_celsius", "Node temperature", ["tx_id"])
-seq_gauge = Gauge("tdma_sequence", "Latest sequence number", ["tx_id"])
-frame_time_gauge = Gauge("tdma_frame_time_ms", "Latest frame time", ["tx_id"])
-inter_message_gauge = Gauge("tdma_inter_message_mseconds",
-                            "Time between consecutive messages from this TX (ms)", ["tx_id"])
-burst_per_gauge = Gauge("tdma_burst_per",
-                         "Packet error rate for the last completed burst (lost / 50)", ["tx_id"])
-cumulative_per_gauge = Gauge("tdma_cumulative_per",
-                              "Cumulative packet error rate across all completed bursts", ["tx_id"])
-
-# -------------------------------------------------
-# Per-TX state
-# -------------------------------------------------
-last_message_time = {}   # tx_id -> last frame_time (ms)
-burst_epoch       = {}   # tx_id -> frame_time of this tx's first-ever packet (grid origin)
-current_window    = {}   # tx_id -> index of the burst window currently in progress
-current_burst_seq = {}   # tx_id -> seq number seen in current window
-burst_received    = {}   # tx_id -> packets received in current window
-
-total_expected = {}  # tx_id -> total packets expected across completed bursts
-total_lost     = {}  # tx_id -> total packets lost across completed bursts
-
-PDC_LINE_RE = re.compile(r"PDC\s+([\d.]+)\s+Seq:(\d+)\s+Tx:(\d+)\s+Temp:(\d+)")
-
-
-def follow(file):
-    file.seek(0, 2)
-    while True:
-        line = file.readline()
-        if not line:
-            time.sleep(0.05)
-            continue
-        yield line
-
-
-def burst_window_index(tx_id, frame_time):
-    if tx_id not in burst_epoch:
-        burst_epoch[tx_id] = frame_time
-        return 0
-    return int((frame_time - burst_epoch[tx_id]) // BURST_DURATION_MS)
-
-
-def close_burst(tx_id, missed_windows=1):
-    """missed_windows > 1 means one or more entire bursts were skipped with zero packets."""
-    received = burst_received.get(tx_id, 0)
-    lost = max(BURST_SIZE - received, 0)
-
-    burst_per = lost / BURST_SIZE
-    burst_per_gauge.labels(tx_id=tx_id).set(burst_per)
-
-    total_expected[tx_id] = total_expected.get(tx_id, 0) + BURST_SIZE
-    total_lost[tx_id] = total_lost.get(tx_id, 0) + lost
-
-    # account for any fully-missed bursts in between (0 packets received at all)
-    for _ in range(missed_windows - 1):
-        total_expected[tx_id] += BURST_SIZE
-        total_lost[tx_id] += BURST_SIZE
-
-    cum_per = total_lost[tx_id] / total_expected[tx_id]
-    cumulative_per_gauge.labels(tx_id=tx_id).set(cum_per)
-
-    print(
-        f"[BURST END] TX={tx_id} seq={current_burst_seq.get(tx_id)} "
-        f"received={received}/{BURST_SIZE} lost={lost} "
-        f"burst_PER={burst_per:.4f} cum_PER={cum_per:.4f}"
-        + (f" (+{missed_windows - 1} fully-missed burst(s))" if missed_windows > 1 else "")
+READ_SIZE = 1024 * 1024     # max bytes drained from the log per read
+POLL_INTERVAL_S = 0.05      # tail loop sleep when inotify is unavailable
+INOTIFY_TIMEOUT_S = 1.0     # re-read even without an event (e.g. network mounts)
+CHECKPOINT_INTERVAL_S = 5.0
+FINGERPRINT_SIZE = 256      # leading log bytes kept to recognise the same file
+STATS_INTERVAL_S = 10.0     # how often each master logs its ingest stats
+LOG_INTERVAL_S = 10.0       # burst-end log lines are rate-limited per master:
+LOG_LIMIT = 20              # at most LOG_LIMIT per LOG_INTERVAL_S, the rest are counted
+
+# --archive: one packed record per PDC packet, the layout of tdma_log.PDC_DTYPE
+# (frame_time f8, seq u16, tx u16, temp i8) so the offline tools can map it directly
+ARCHIVE_RECORD = struct.Struct("<dHHb")
+ARCHIVE_SUFFIX = ".pdc"
+ARCHIVE_FLUSH_BYTES = 64 * 1024
+
+# Histogram buckets (ms), tuned to 40 ms slots and 2000 ms burst windows.
+# Intervals: sub-ms resolution around one slot (jitter), then 1, 2, 5, 12 and
+# 25 lost slots, then whole burst periods (the gap into the next burst).
+INTERVAL_BUCKETS_MS = (35, 39, 39.9, 40.1, 41, 45, 85, 125, 245, 525, 1025,
+                       2045, 4045, 10045, 20045, INF)
+# First to last packet of a burst: 49 slots (1960 ms) when complete, shorter
+# when its first or last packets were lost; 0 for a single-packet burst.
+BURST_DURATION_BUCKETS_MS = (0, 400, 1000, 1600, 1800, 1880, 1920, 1940,
+                             1959, 1961, 1980, 2000, INF)
+# Last packet of a burst to its [BURST END] accounting, which happens when
+# the TX's next burst starts: about one window plus a slot, longer when
+# whole bursts were missed.
+BURST_END_LAG_BUCKETS_MS = (45, 85, 250, 500, 1000, 2045, 4045, 8045, 16045,
+                            30000, 60000, INF)
+# Exporter self-instrumentation: parse + update time per log line (seconds)
+LINE_TIME_BUCKETS_S = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 1e-3, 1e-2, INF)
+
+log = logging.getLogger("tdma_exporter")
+
+
+def fields(**values):
+    """key=value pairs for a structured log line."""
+    return " ".join(f"{k}={v}" for k, v in values.items())
+
+
+class RateLimitedLog:
+    """
+    Passes at most limit log lines per interval seconds to log.info and counts
+    the rest, reporting how many were dropped when the next interval starts.
+    """
+
+    def __init__(self, interval=LOG_INTERVAL_S, limit=LOG_LIMIT):
+        self.interval = interval
+        self.limit = limit
+        self.window_start = time.monotonic()
+        self.emitted = 0
+        self.suppressed = 0
+
+    def info(self, message):
+        now = time.monotonic()
+        if now - self.window_start >= self.interval:
+            if self.suppressed:
+                log.info(fields(event="suppressed", lines=self.suppressed,
+                                seconds=round(now - self.window_start, 1)))
+            self.window_start, self.emitted, self.suppressed = now, 0, 0
+        if self.emitted < self.limit:
+            self.emitted += 1
+            log.info(message)
+        else:
+            self.suppressed += 1
+
+
+class ArchiveSink:
+    """
+    Appends every parsed PDC record to binary segments under one directory
+    (one per master), so the analysis tools read the records back with
+    tdma_log.read_archive() instead of reparsing the text log.
+
+    Records are buffered and written in batches of ARCHIVE_FLUSH_BYTES (and
+    on every checkpoint). A new segment, named after its UTC start time,
+    is begun every hour and whenever frame_time restarts, so each segment is
+    in frame_time order and a reader can skip it from its first and last
+    record alone.
+    """
+
+    def __init__(self, directory):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.buf = bytearray()
+        self.segment = None         # Path of the segment being appended to
+        self.last_time = None
+
+    def add(self, frame_time, seq, tx, temp):
+        if self.last_time is not None and frame_time < self.last_time - BURST_DURATION_MS:
+            self.flush()
+            self.segment = None     # frame_time restarted (master reboot)
+        self.last_time = frame_time
+        self.buf += ARCHIVE_RECORD.pack(frame_time, seq, tx, max(-128, min(temp, 127)))
+        if len(self.buf) >= ARCHIVE_FLUSH_BYTES:
+            self.flush()
+
+    def _new_segment(self):
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        path, n = self.dir / f"{stamp}{ARCHIVE_SUFFIX}", 0
+        while path.exists():
+            n += 1
+            path = self.dir / f"{stamp}_{n:03d}{ARCHIVE_SUFFIX}"
+        return path
+
+    def flush(self):
+        if not self.buf:
+            return
+        if self.segment is None or not self.segment.name.startswith(time.strftime("%Y%m%dT%H", time.gmtime())):
+            self.segment = self._new_segment()
+        try:
+            with open(self.segment, "ab") as f:
+                f.write(self.buf)
+        except OSError as e:
+            log.warning(fields(event="archive_write_failed", path=self.segment,
+                               records=len(self.buf) // ARCHIVE_RECORD.size, error=repr(str(e))))
+        self.buf.clear()
+
+    def position(self):
+        """Where the archive ends, for the checkpoint (call after flush())."""
+        if self.segment is None:
+            return None
+        try:
+            return {"segment": self.segment.name, "size": self.segment.stat().st_size}
+        except OSError:
+            return None
+
+    def restore(self, position):
+        """
+        Cut the archive back to a checkpointed position: the records written
+        after it will be parsed (and archived) again from the log.
+        """
+        if not position:
+            return
+        for path in sorted(self.dir.glob("*" + ARCHIVE_SUFFIX)):
+            if path.name > position["segment"]:
+                path.unlink()
+        self.segment = self.dir / position["segment"]
+        try:
+            with open(self.segment, "r+b") as f:
+                f.truncate(position["size"])
+        except OSError:
+            self.segment = None
+
+
+class TxHistogram:
+    """Per-TX classic histogram kept as plain bucket-count lists; exposed by TdmaCollector."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = {}    # tx_id -> [observations per bucket] (not cumulative)
+        self.sums = {}      # tx_id -> sum of observations
+
+    def observe(self, tx_id, value, n=1):
+        """Count n observations of value."""
+        counts = self.counts.get(tx_id)
+        if counts is None:
+            counts = self.counts[tx_id] = [0] * len(self.buckets)
+            self.sums[tx_id] = 0.0
+        counts[bisect_left(self.buckets, value)] += n
+        self.sums[tx_id] += value * n
+
+    def samples(self):
+        """(tx_id, [(le, cumulative count)], sum) for every TX observed."""
+        bounds = [floatToGoString(b) for b in self.buckets]
+        for tx_id, counts in list(self.counts.items()):
+            cumulative = itertools.accumulate(list(counts))
+            yield tx_id, list(zip(bounds, cumulative)), self.sums[tx_id]
+
+
+class Master:
+    """
+    Burst accounting for the log of one FT master. Every master has its own
+    per-TX state, histograms, tail and checkpoint, so several logs can be
+    followed in one process without their bursts mixing.
+    """
+
+    # per-TX dicts persisted in the checkpoint
+    CHECKPOINTED = (
+        "last_message_time", "burst_epoch", "current_window", "current_burst_seq",
+        "burst_received", "burst_first_time", "total_expected", "total_lost", "packets_total",
     )
 
+    def __init__(self, name, log_file):
+        self.name = name
+        self.log_file = log_file
+        self.checkpoint_file = log_file + CHECKPOINT_SUFFIX
+        self.tail = None
+        self.archive = None          # ArchiveSink with --archive
+        self.frame_time = None       # frame_time of the latest PDC packet, any TX
 
-def main():
-    print("Starting Prometheus exporter on :8000")
-    start_http_server(8000)
+        self.last_message_time = {}  # tx_id -> last frame_time (ms)
+        self.burst_epoch       = {}  # tx_id -> frame_time of this tx's first-ever packet (grid origin)
+        self.current_window    = {}  # tx_id -> index of the burst window currently in progress
+        self.current_burst_seq = {}  # tx_id -> seq number seen in current window
+        self.burst_received    = {}  # tx_id -> packets received in current window
+        self.burst_first_time  = {}  # tx_id -> frame_time of the first packet in current window
+
+        self.total_expected = {}     # tx_id -> total packets expected across completed bursts
+        self.total_lost     = {}     # tx_id -> total packets lost across completed bursts
+        self.packets_total  = {}     # tx_id -> packets counted
+
+        self.beacons_total  = 0      # "Beacon fired" lines
+        self.lines_by_kind  = {}     # tdma_lines kind -> lines of that type, PDC aside
+
+        self.temperature    = {}     # tx_id -> latest temperature
+        self.last_delta     = {}     # tx_id -> latest inter-message time (ms)
+        self.last_burst_per = {}     # tx_id -> PER of the last completed burst
+
+        self.interval_hist = TxHistogram(INTERVAL_BUCKETS_MS)
+        self.burst_duration_hist = TxHistogram(BURST_DURATION_BUCKETS_MS)
+        self.burst_end_lag_hist = TxHistogram(BURST_END_LAG_BUCKETS_MS)
+
+        # exporter self-instrumentation (this process only, not checkpointed)
+        self.lines_read = 0
+        self.lines_pdc = 0
+        self.bytes_read = 0
+        self.line_time_hist = TxHistogram(LINE_TIME_BUCKETS_S)     # single key ""
+        self.burst_log = RateLimitedLog()
+
+    # -------------------------------------------------
+    # Checkpoint
+    # -------------------------------------------------
+
+    def burst_state(self):
+        """The per-TX dicts persisted in the checkpoint, by name."""
+        return {name: getattr(self, name) for name in self.CHECKPOINTED}
+
+    def save_checkpoint(self):
+        state = {
+            "inode": self.tail.inode,
+            "offset": self.tail.offset,
+            "head": self.tail.head().hex(),
+            "tx": self.burst_state(),
+        }
+        if self.archive is not None:
+            # the archive must never run ahead of the checkpointed offset
+            self.archive.flush()
+            state["archive"] = self.archive.position()
+        tmp = self.checkpoint_file + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.checkpoint_file)
+        except OSError as e:
+            log.warning(fields(event="checkpoint_failed", master=self.name,
+                               path=self.checkpoint_file, error=repr(str(e))))
+
+    def load_checkpoint(self):
+        """
+        Restore per-TX burst state and counters from the checkpoint and return
+        the offset to resume the log at: the saved one if the log is still the
+        same file, 0 if it was rotated or truncated since, None (start at the
+        end, as on a first start) if there is no checkpoint.
+        """
+        try:
+            with open(self.checkpoint_file) as f:
+                state = json.load(f)
+            for name, values in self.burst_state().items():
+                values.update(state["tx"].get(name, {}))
+        except (OSError, ValueError, KeyError):
+            return None
+        if self.archive is not None:
+            self.archive.restore(state.get("archive"))
+
+        try:
+            st = os.stat(self.log_file)
+            with open(self.log_file, "rb") as f:
+                head = f.read(FINGERPRINT_SIZE)
+        except OSError:
+            return 0
+        offset = state["offset"]
+        saved_head = bytes.fromhex(state["head"])
+        if st.st_ino != state["inode"] or st.st_size < offset or head[:len(saved_head)] != saved_head:
+            log.info(fields(event="log_changed_while_down", master=self.name, path=self.log_file))
+            return 0
+        log.info(fields(event="resume", master=self.name, path=self.log_file,
+                        offset=offset, size=st.st_size))
+        return offset
+
+    # -------------------------------------------------
+    # Burst accounting
+    # -------------------------------------------------
+
+    def burst_window_index(self, tx_id, frame_time):
+        if tx_id not in self.burst_epoch:
+            self.burst_epoch[tx_id] = frame_time
+            return 0
+        return int((frame_time - self.burst_epoch[tx_id]) // BURST_DURATION_MS)
+
+    def close_burst(self, tx_id, missed_windows=1, last_time=None, closed_at=None):
+        """
+        missed_windows > 1 means one or more entire bursts were skipped with zero packets.
+        last_time is the frame_time of the burst's last packet, closed_at that of
+        the packet that ended it.
+        """
+        if last_time is not None:
+            if tx_id in self.burst_first_time:
+                self.burst_duration_hist.observe(tx_id, last_time - self.burst_first_time[tx_id])
+            self.burst_end_lag_hist.observe(tx_id, closed_at - last_time)
+
+        received = self.burst_received.get(tx_id, 0)
+        lost = max(BURST_SIZE - received, 0)
+
+        burst_per = lost / BURST_SIZE
+        self.last_burst_per[tx_id] = burst_per
+
+        self.total_expected[tx_id] = self.total_expected.get(tx_id, 0) + BURST_SIZE
+        self.total_lost[tx_id] = self.total_lost.get(tx_id, 0) + lost
+
+        # account for any fully-missed bursts in between (0 packets received at all)
+        for _ in range(missed_windows - 1):
+            self.total_expected[tx_id] += BURST_SIZE
+            self.total_lost[tx_id] += BURST_SIZE
+
+        cum_per = self.total_lost[tx_id] / self.total_expected[tx_id]
+
+        self.burst_log.info(fields(
+            event="burst_end", master=self.name, tx=tx_id, seq=self.current_burst_seq.get(tx_id),
+            received=received, lost=lost, burst_per=f"{burst_per:.4f}", cum_per=f"{cum_per:.4f}",
+            missed_bursts=missed_windows - 1,
+        ))
+
+    def handle_line(self, line):
+        parsed = parse_line(line)
+        if parsed is None:
+            return
+        kind, record = parsed
+        if kind != PDC:
+            self.lines_by_kind[kind] = self.lines_by_kind.get(kind, 0) + 1
+            if kind == BEACON:
+                self.beacons_total += 1
+            return
+        frame_time, current_seq, tx, temp = record
+        tx_id = str(tx)
+
+        self.lines_pdc += 1
+        self.frame_time = frame_time
+        if self.archive is not None:
+            self.archive.add(frame_time, current_seq, tx, temp)
+        self.packets_total[tx_id] = self.packets_total.get(tx_id, 0) + 1
+        self.temperature[tx_id] = temp
+
+        prev_time = self.last_message_time.get(tx_id)
+        if prev_time is not None:
+            delta = frame_time - prev_time
+            self.last_delta[tx_id] = delta
+            self.interval_hist.observe(tx_id, delta)
+        self.last_message_time[tx_id] = frame_time
+
+        window = self.burst_window_index(tx_id, frame_time)
+
+        if tx_id not in self.current_window:
+            self.current_window[tx_id] = window
+            self.current_burst_seq[tx_id] = current_seq
+            self.burst_received[tx_id] = 1
+            self.burst_first_time[tx_id] = frame_time
+        elif window != self.current_window[tx_id]:
+            missed = window - self.current_window[tx_id]
+            self.close_burst(tx_id, missed_windows=missed, last_time=prev_time, closed_at=frame_time)
+            self.current_window[tx_id] = window
+            self.current_burst_seq[tx_id] = current_seq
+            self.burst_received[tx_id] = 1
+            self.burst_first_time[tx_id] = frame_time
+        else:
+            self.burst_received[tx_id] = self.burst_received.get(tx_id, 0) + 1
+            self.current_burst_seq[tx_id] = current_seq
+
+    def handle_lines(self, lines, n_bytes):
+        """
+        Handle one batch from the tail. The batch is timed as a whole and
+        counted in line_time_hist as len(lines) lines of its mean cost, which
+        keeps the clock out of the per-line path (live batches are a line or two).
+        """
+        start = time.perf_counter()
+        for line in lines:
+            self.handle_line(line)
+        if lines:
+            self.line_time_hist.observe("", (time.perf_counter() - start) / len(lines), len(lines))
+        self.lines_read += len(lines)
+        self.bytes_read += n_bytes
+
+    def tail_lag_bytes(self):
+        """Bytes appended to the log that have not been handled yet."""
+        try:
+            return max(os.stat(self.log_file).st_size - self.tail.offset, 0)
+        except (OSError, AttributeError):
+            return 0
 
-    with open(LOG_FILE, "r") as f:
-        for line in follow(f):
-            line = line.strip()
+    def log_stats(self, since, lines_before):
+        now = time.monotonic()
+        log.info(fields(
+            event="stats", master=self.name, lines=self.lines_read,
+            lines_per_s=round((self.lines_read - lines_before) / (now - since)),
+            pdc=self.lines_pdc, unmatched=self.lines_read - self.lines_pdc,
+            tail_lag_bytes=self.tail_lag_bytes(),
+        ))
 
-            m = PDC_LINE_RE.search(line)
-            if not m:
+    async def run(self):
+        """Follow the log until the tail is stopped, checkpointing as it goes."""
+        await self.tail.open(self.load_checkpoint())
+        last_save = last_stats = time.monotonic()
+        stats_lines = self.lines_read
+        try:
+            async for lines in self.tail.lines():
+                self.handle_lines(lines, self.tail.batch_bytes)
+                now = time.monotonic()
+                if now - last_save >= CHECKPOINT_INTERVAL_S:
+                    self.save_checkpoint()
+                    last_save = now
+                if now - last_stats >= STATS_INTERVAL_S:
+                    self.log_stats(last_stats, stats_lines)
+                    last_stats, stats_lines = now, self.lines_read
+                await asyncio.sleep(0)  # let the other logs in while catching up
+        finally:
+            if self.tail.file is not None:
+                self.save_checkpoint()
+            self.tail.close()
+
+    async def replay(self, speed):
+        """
+        Feed the whole log through the burst accounting, paced by PDC frame_time
+        at speed x real time (0: as fast as possible), and report the rate reached.
+        """
+        lines_done = 0
+        first_frame = None          # frame_time where the current pacing run started
+        span_ms = 0.0               # frame_time covered by the log
+        pace_from = None            # wall clock matching first_frame
+        start = time.perf_counter()
+
+        with open_log(self.log_file) as f:     # .gz/.zst are decompressed as they are read
+            tail = b""
+            while chunk := f.read(READ_SIZE):
+                chunk = tail + chunk
+                cut = chunk.rfind(b"\n") + 1
+                tail = chunk[cut:]
+                lines = chunk[:cut].decode(errors="replace").splitlines()
+                self.lines_read += len(lines)
+                self.bytes_read += cut
+                for line in lines:
+                    last_frame = self.frame_time
+                    self.handle_line(line)
+                    frame_time = self.frame_time
+                    if frame_time is None or frame_time == last_frame:
+                        continue
+                    if first_frame is None or frame_time < last_frame - BURST_DURATION_MS:
+                        # first packet, or frame_time restarted (master reboot)
+                        if first_frame is not None:
+                            span_ms += last_frame - first_frame
+                        first_frame, pace_from = frame_time, time.perf_counter()
+                    elif speed:
+                        ahead = pace_from + (frame_time - first_frame) / 1000.0 / speed \
+                            - time.perf_counter()
+                        if ahead > 0.001:
+                            await asyncio.sleep(ahead)
+                lines_done += len(lines)
+                await asyncio.sleep(0)
+
+        if self.archive is not None:
+            self.archive.flush()
+        elapsed = time.perf_counter() - start
+        if first_frame is not None:
+            span_ms += self.frame_time - first_frame
+        speed_up = span_ms / 1000.0 / elapsed if elapsed else float("inf")
+        print(f"Replayed {self.name} ({self.log_file}): {lines_done} lines ({sum(self.packets_total.values())} PDC) "
+              f"in {elapsed:.2f} s = {lines_done / elapsed:.0f} lines/s")
+        if speed:
+            print(f"  {span_ms / 1000:.1f} s of frame_time at {speed_up:.1f}x real time "
+                  f"(requested {speed:g}x{'' if speed_up >= 0.95 * speed else ', could not keep up'})")
+        else:
+            print(f"  {span_ms / 1000:.1f} s of frame_time: max sustainable speed-up {speed_up:.0f}x")
+        return lines_done, span_ms, elapsed
+
+
+class TdmaCollector:
+    """
+    Builds the per-master, per-TX metric families from the masters' state at
+    scrape time, so ingesting a line is only a few dict writes instead of a
+    .labels() lookup and a lock per metric.
+    """
+
+    LABELS = ["master", "tx_id"]
+
+    GAUGES = (
+        ("tdma_temperature_celsius", "Node temperature", "temperature"),
+        ("tdma_sequence", "Latest sequence number", "current_burst_seq"),
+        ("tdma_frame_time_ms", "Latest frame time", "last_message_time"),
+        ("tdma_inter_message_mseconds",
+         "Time between consecutive messages from this TX (ms)", "last_delta"),
+        ("tdma_burst_per",
+         "Packet error rate for the last completed burst (lost / 50)", "last_burst_per"),
+    )
+
+    HISTOGRAMS = (
+        ("tdma_inter_message_interval_mseconds",
+         "Time between consecutive messages from this TX (ms)", "interval_hist"),
+        ("tdma_burst_duration_mseconds",
+         "Time from the first to the last packet of a completed burst (ms)", "burst_duration_hist"),
+        ("tdma_burst_end_lag_mseconds",
+         "Time from the last packet of a burst to its [BURST END] accounting (ms)",
+         "burst_end_lag_hist"),
+    )
+
+    def __init__(self, masters):
+        self.masters = masters
+
+    def collect(self):
+        # list() snapshots each dict atomically under the GIL while the tail
+        # loop keeps writing to it
+        packets = CounterMetricFamily("tdma_packets", "Total TDMA packets", labels=self.LABELS)
+        for master in self.masters:
+            for tx_id, n in list(master.packets_total.items()):
+                packets.add_metric([master.name, tx_id], n)
+        yield packets
+
+        beacons = CounterMetricFamily("tdma_beacons", "Total TDMA beacons", labels=["master"])
+        known = CounterMetricFamily("tdma_log_lines", "Master log lines read, by line type",
+                                    labels=["master", "kind"])
+        for master in self.masters:
+            beacons.add_metric([master.name], master.beacons_total)
+            known.add_metric([master.name, PDC], master.lines_pdc)
+            for kind, n in list(master.lines_by_kind.items()):
+                known.add_metric([master.name, kind], n)
+        yield beacons
+        yield known
+
+        for name, doc, attr in self.GAUGES:
+            family = GaugeMetricFamily(name, doc, labels=self.LABELS)
+            for master in self.masters:
+                for tx_id, v in list(getattr(master, attr).items()):
+                    family.add_metric([master.name, tx_id], v)
+            yield family
+
+        cum_per = GaugeMetricFamily("tdma_cumulative_per",
+                                    "Cumulative packet error rate across all completed bursts",
+                                    labels=self.LABELS)
+        for master in self.masters:
+            for tx_id, expected in list(master.total_expected.items()):
+                if expected:
+                    cum_per.add_metric([master.name, tx_id], master.total_lost[tx_id] / expected)
+        yield cum_per
+
+        for name, doc, attr in self.HISTOGRAMS:
+            family = HistogramMetricFamily(name, doc, labels=self.LABELS)
+            for master in self.masters:
+                for tx_id, buckets, total in getattr(master, attr).samples():
+                    family.add_metric([master.name, tx_id], buckets, total)
+            yield family
+
+        yield from self.collect_self()
+
+    def collect_self(self):
+        """The exporter's own ingest metrics, per master."""
+        lines = CounterMetricFamily("tdma_exporter_lines",
+                                    "Log lines read, by whether they were PDC lines",
+                                    labels=["master", "result"])
+        read = CounterMetricFamily("tdma_exporter_read_bytes", "Log bytes read", labels=["master"])
+        lag = GaugeMetricFamily("tdma_exporter_tail_lag_bytes",
+                                "Bytes appended to the log but not handled yet", labels=["master"])
+        line_time = HistogramMetricFamily("tdma_exporter_line_seconds",
+                                          "Parse and update time per log line", labels=["master"])
+        for master in self.masters:
+            lines.add_metric([master.name, "matched"], master.lines_pdc)
+            lines.add_metric([master.name, "unmatched"], master.lines_read - master.lines_pdc)
+            read.add_metric([master.name], master.bytes_read)
+            lag.add_metric([master.name], master.tail_lag_bytes())
+            for _, buckets, total in master.line_time_hist.samples():
+                line_time.add_metric([master.name], buckets, total)
+        yield lines
+        yield read
+        yield lag
+        yield line_time
+
+
+class Inotify:
+    """inotify watches on several files through libc (Linux only), dispatched on the asyncio loop."""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    EVENT = struct.Struct("iIII")   # wd, mask, cookie, len (+ len bytes of name)
+
+    def __init__(self, loop):
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.loop = loop
+        self.events = {}    # wd -> asyncio.Event set when the file changes
+        loop.add_reader(self.fd, self._dispatch)
+
+    def watch(self, path):
+        """Return (event, wd): event is set whenever path changes."""
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_DELETE_SELF | self.IN_MOVE_SELF
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return self.events.setdefault(wd, asyncio.Event()), wd
+
+    def unwatch(self, wd):
+        if self.events.pop(wd, None) is not None:
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def _dispatch(self):
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + self.EVENT.size <= len(buf):
+            wd, _, _, length = self.EVENT.unpack_from(buf, pos)
+            pos += self.EVENT.size + length
+            event = self.events.get(wd)
+            if event is not None:
+                event.set()
+
+    def close(self):
+        self.loop.remove_reader(self.fd)
+        os.close(self.fd)
+
+
+class LogTail:
+    """
+    Tails one log across exporter restarts, log rotation and truncation.
+
+    lines() yields lists of complete lines appended to the log: it sleeps
+    until inotify reports a write (polling every POLL_INTERVAL_S where
+    inotify is unavailable), then drains everything appended since in one
+    read and splits it into lines in bulk. A partial last line is held back
+    until its newline arrives. offset is the byte just past the last line
+    handed out, so (inode, offset) is where a restarted exporter resumes.
+
+    Whenever the log goes quiet the path is re-checked: a new inode means the
+    log was rotated (the new file is read from its start), a size below our
+    read position means it was truncated in place (reading restarts at 0).
+    """
+
+    def __init__(self, path, inotify=None):
+        self.path = path
+        self.inotify = inotify
+        self.file = None
+        self.wd = None
+        self.wakeup = asyncio.Event()
+        self.inode = None
+        self.offset = 0
+        self.batch_bytes = 0    # size of the batch lines() handed out last
+        self.stopped = False
+
+    async def open(self, offset=None):
+        """Open the log at offset (None: at its end), waiting for it to appear."""
+        self.close()
+        while not self.stopped:
+            try:
+                self.file = open(self.path, "rb", buffering=0)
+                break
+            except FileNotFoundError:
+                await self._sleep(INOTIFY_TIMEOUT_S)
+        else:
+            return
+        if self.inotify is not None:
+            try:
+                self.wakeup, self.wd = self.inotify.watch(self.path)
+            except OSError:
+                self.wd = None
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        self.offset = self.file.seek(0, 2) if offset is None else self.file.seek(offset)
+
+    def close(self):
+        if self.wd is not None:
+            self.inotify.unwatch(self.wd)
+            self.wd = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def stop(self):
+        """Make lines() return at its next wake-up."""
+        self.stopped = True
+        self.wakeup.set()
+
+    def head(self):
+        """Up to FINGERPRINT_SIZE leading bytes of the open log (not past offset)."""
+        return os.pread(self.file.fileno(), min(self.offset, FINGERPRINT_SIZE), 0)
+
+    async def _sleep(self, timeout):
+        """Wait for a change to the log (or stop()) for at most timeout seconds."""
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.wakeup.clear()
+
+    def _replaced(self, position):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False    # rotated away and not recreated yet: keep waiting
+        if st.st_ino != self.inode:
+            log.info(fields(event="rotated", path=self.path))
+            return True
+        if st.st_size < position:
+            log.info(fields(event="truncated", path=self.path))
+            return True
+        return False
+
+    async def lines(self):
+        tail = b""
+        while not self.stopped:
+            chunk = self.file.read(READ_SIZE)
+
+            if not chunk:
+                if self._replaced(self.offset + len(tail)):
+                    await self.open(0)
+                    tail = b""
+                    continue
+                await self._sleep(INOTIFY_TIMEOUT_S if self.wd is not None else POLL_INTERVAL_S)
                 continue
 
-            frame_time = float(m.group(1))
-            current_seq = int(m.group(2))
-            tx_id = m.group(3)
-            temp = int(m.group(4))
-
-            delta = None
-            if tx_id in last_message_time:
-                delta = frame_time - last_message_time[tx_id]
-                inter_message_gauge.labels(tx_id=tx_id).set(delta)
-            last_message_time[tx_id] = frame_time
-
-            window = burst_window_index(tx_id, frame_time)
-
-            if tx_id not in current_window:
-                current_window[tx_id] = window
-                current_burst_seq[tx_id] = current_seq
-                burst_received[tx_id] = 1
-            elif window != current_window[tx_id]:
-                missed = window - current_window[tx_id]
-                close_burst(tx_id, missed_windows=missed)
-                current_window[tx_id] = window
-                current_burst_seq[tx_id] = current_seq
-                burst_received[tx_id] = 1
-            else:
-                burst_received[tx_id] = burst_received.get(tx_id, 0) + 1
-                current_burst_seq[tx_id] = current_seq
-
-            packet_counter.labels(tx_id=tx_id).inc()
-            temperature_gauge.labels(tx_id=tx_id).set(temp)
-            seq_gauge.labels(tx_id=tx_id).set(current_seq)
-            frame_time_gauge.labels(tx_id=tx_id).set(frame_time)
-
-            print(
-                f"TX={tx_id} SEQ={current_seq} TEMP={temp} "
-                f"DT={f'{delta:.3f}ms' if delta is not None else 'n/a'} "
-                f"burst_rx={burst_received.get(tx_id, 0)}"
-            )
+            chunk = tail + chunk
+            cut = chunk.rfind(b"\n") + 1
+            tail = chunk[cut:]
+            if cut:
+                self.offset += cut
+                self.batch_bytes = cut
+                yield chunk[:cut].decode(errors="replace").splitlines()
+
+
+async def serve(masters):
+    loop = asyncio.get_running_loop()
+    try:
+        inotify = Inotify(loop)
+    except (OSError, AttributeError):
+        inotify = None
+        log.info(fields(event="inotify_unavailable", poll_interval_s=POLL_INTERVAL_S))
+
+    for master in masters:
+        master.tail = LogTail(master.log_file, inotify)
+
+    # docker stop sends SIGTERM: every log finishes its current batch, then checkpoints
+    def stop():
+        for master in masters:
+            master.tail.stop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop)
+
+    try:
+        await asyncio.gather(*(master.run() for master in masters))
+    finally:
+        if inotify is not None:
+            inotify.close()
+
+
+async def replay(masters, speed, once=False):
+    """Replay every log, then keep /metrics up (unless once) until SIGTERM/SIGINT."""
+    await asyncio.gather(*(master.replay(speed) for master in masters))
+    if once:
+        return
+
+    # the point of a replay is usually to look at it in Prometheus/Grafana,
+    # which can only scrape what is still being served
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopped.set)
+    log.info(fields(event="replay_done", masters=",".join(master.name for master in masters),
+                    action="serving /metrics until SIGTERM/SIGINT"))
+    await stopped.wait()
+
+
+def parse_masters(specs):
+    """[name=]path arguments -> Masters; the name defaults to the log's file stem."""
+    masters = []
+    for spec in specs:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            name, path = Path(spec).name, spec
+            for suffix in COMPRESSED_SUFFIXES:
+                name = name.removesuffix(suffix)
+            name = Path(name).stem
+        masters.append(Master(name, path))
+    return masters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prometheus exporter for FT master TDMA logs.")
+    parser.add_argument("logs", nargs="*", default=[LOG_FILE], metavar="[NAME=]LOG",
+                        help=f"Master logs to follow, labelled master=NAME "
+                             f"(default: {LOG_FILE}, NAME: the file name without extension)")
+    parser.add_argument("--port", type=int, default=PORT, help=f"HTTP port (default: {PORT})")
+    parser.add_argument("--replay", action="store_true",
+                        help="Replay the logs from their start (paced by PDC frame_time) "
+                             "instead of following them; reports lines/s and the speed-up reached")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="--replay pace in x real time (default: 0, as fast as possible)")
+    parser.add_argument("--once", action="store_true",
+                        help="With --replay, exit when the logs are replayed instead of serving "
+                             "/metrics until stopped (benchmarks, archive backfills)")
+    parser.add_argument("--archive", metavar="DIR",
+                        help="Also archive every PDC record under DIR/<master>/ for the analysis "
+                             "tools (metrics.py, parse_and_plot.py, distances.py accept DIR/<master>)")
+    args = parser.parse_args()
+
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    masters = parse_masters(args.logs)
+    names = [master.name for master in masters]
+    if len(set(names)) != len(names):
+        parser.error(f"master names must be unique, got {names}")
+    if not args.replay and any(is_compressed(master.log_file) for master in masters):
+        parser.error("compressed logs can only be read with --replay")
+    if args.archive:
+        for master in masters:
+            master.archive = ArchiveSink(Path(args.archive) / master.name)
+
+    REGISTRY.register(TdmaCollector(masters))
+    log.info(fields(event="start", port=args.port, masters=",".join(names)))
+    start_http_server(args.port)
+    if args.replay:
+        asyncio.run(replay(masters, args.speed, args.once))
+    else:
+        asyncio.run(serve(masters))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
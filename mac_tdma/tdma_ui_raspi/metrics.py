@@ -6,38 +6,54 @@ Parses a DECT MAC beacon log (default: logs/master_output.txt) and identifies
 missing PDC (Physical Data Channel) packets.
 
 Expected packet structure, per the burst protocol being logged:
-  - Packets are logged in "bursts" that share the same Seq id.
+  - Each TX logs its packets in "bursts" that share the same Seq id.
   - Each burst is expected to contain 40 packets.
   - Consecutive packets within a burst are expected to be spaced 40 ms apart.
   - The gap between the last packet of one burst and the first packet of the
-    next burst (different Seq id) is expected to be 400 ms.
+    next burst (different Seq id) of the same TX is expected to be 400 ms.
 
 The script:
   1. Parses every line of the form:
        PDC <frame_time> Seq:<seq_id> Tx:<tx> Temp:<temp>
-  2. Groups packets by Seq id (each Seq id is treated as one burst).
+     in bulk (see tdma_log.read_pdc) into typed NumPy columns.
+  2. Groups packets by (Tx, Seq id): each TX's Seq id is one burst, so TXs
+     that happen to share Seq numbers are never mixed.
   3. For each burst, builds the expected 40-slot, 40ms-spaced timeline
      starting at that burst's first observed packet time, and reports any
      slot that has no matching packet as MISSING (with its expected frame
      time and its slot/packet number within the burst, 0-39).
-  4. Checks the gap between the end of each burst and the start of the next
-     burst against the expected 400 ms and flags any burst-to-burst gap that
+  4. Checks the gap between the end of each burst and the start of the same
+     TX's next burst against the expected 400 ms and flags any burst-to-burst gap that
      doesn't match (this can indicate whole bursts, or the tail/head of
      adjoining bursts, being lost).
+  5. Prints a per-TX loss and gap summary.
 
 Usage:
-    python3 parse_missing_packets.py [logfile] [--csv missing.csv]
+    python3 parse_missing_packets.py [logfile] [--csv missing.csv] [--from T1] [--to T2] [--full] [--follow] [--jobs N]
 
-    logfile   Path to the log file (default: logs/master_output.txt)
+    logfile   Path to the log file (plain, .gz or .zst), or an exporter
+              --archive directory (default: logs/master_output.txt)
     --csv     Optional path to write a CSV of the missing packets found
+    --from    Only analyse packets with frame_time >= T1 (ms)
+    --to      Only analyse packets with frame_time <= T2 (ms)
+    --full    Reparse the whole log instead of resuming from the checkpoint
+              left beside it by the previous run (see read_pdc_incremental)
+    --follow  Keep reading the log as it grows and report missing packets as
+              each burst's window closes (see OnlineDetector); Ctrl-C stops
+    --jobs    Parse the log in N processes (0: one per core); the records are
+              merged in file order before the burst analysis
 """
 
-import re
 import csv
 import argparse
-from collections import OrderedDict
+import os
 
-PDC_RE = re.compile(r'^PDC\s+([\d.]+)\s+Seq:(\d+)\s+Tx:(\d+)\s+Temp:(-?\d+)')
+import numpy as np
+import pandas as pd
+
+from tdma_grid import fit_slot_grids
+from tdma_lines import is_compressed
+from tdma_log import follow_pdc, read_pdc_incremental, read_pdc_window
 
 EXPECTED_BURST_SIZE = 50      # expected packets per Seq burst
 INTRA_BURST_STEP_MS = 40.0    # expected spacing between packets in same burst
@@ -46,133 +62,387 @@ SLOT_TOLERANCE_MS = 5.0       # tolerance when matching a packet to an expected
 GAP_TOLERANCE_MS = 5.0        # tolerance when checking the inter-burst gap
 
 
-def parse_log(path):
-    """Read the log file and return a list of packet dicts, in file order."""
-    packets = []
-    with open(path, 'r') as f:
-        for line in f:
-            m = PDC_RE.match(line.strip())
-            if m:
-                packets.append({
-                    'time': float(m.group(1)),
-                    'seq': int(m.group(2)),
-                    'tx': int(m.group(3)),
-                    'temp': int(m.group(4)),
-                })
-    return packets
+def parse_log(path, t_from=None, t_to=None, resume=True, jobs=1):
+    """
+    Read the log file and return a PDC_DTYPE array of packets, in file order.
+    With a time window only that part of the log is read (see read_pdc_window);
+    otherwise only the bytes appended since the last run are parsed and merged
+    with the checkpointed packets, unless resume is False. jobs > 1 parses in
+    that many processes.
+    """
+    if t_from is None and t_to is None:
+        return read_pdc_incremental(path, resume=resume, jobs=jobs)
+    return read_pdc_window(path, t_from, t_to, jobs=jobs)
+
 
+BURST_DTYPE = np.dtype([
+    ('tx', np.uint16),
+    ('seq', np.uint16),
+    ('first_time', np.float64),
+    ('last_time', np.float64),
+    ('found', np.int64),        # packets received
+    ('expected', np.int64),     # slots the burst should have had
+    ('missing', np.int64),      # slots with no packet
+])
 
-def group_by_seq(packets):
-    """Group packets by Seq id, preserving first-seen order, sorted by time."""
-    groups = OrderedDict()
-    for p in packets:
-        groups.setdefault(p['seq'], []).append(p)
-    for seq in groups:
-        groups[seq].sort(key=lambda p: p['time'])
-    return groups
+MISSING_DTYPE = np.dtype([
+    ('tx', np.uint16),
+    ('seq', np.uint16),
+    ('slot', np.int64),
+    ('expected_time', np.float64),
+])
 
 
-def analyze_burst(seq, pkts):
+def analyze_bursts(packets, fit=True):
     """
-    Compare a burst's actual packet times against the expected 40-slot,
-    40ms-spaced timeline. Returns (missing_list, found_count, expected_count).
+    Compare every burst's packet times against its expected 40-slot,
+    40ms-spaced timeline, for all bursts at once. A burst is one TX's Seq id;
+    Seq is 8-bit in the firmware and wraps every 256 bursts, so packets of
+    the same (tx, seq) more than a burst window apart are separate bursts.
+
+    With fit=True the timeline is each TX's fitted slot grid (see
+    tdma_grid.fit_slot_grid), which follows clock drift, and a burst's slot 0
+    is the grid slot where that TX's bursts usually start, so a lost first
+    packet does not shift the whole burst. fit=False lays an exact 40 ms
+    grid from each burst's first observed packet.
+
+    Returns (bursts, missing): one BURST_DTYPE row per burst in first-seen
+    order, and one MISSING_DTYPE row per missing slot, grouped by burst in
+    the same order and by slot within a burst.
     """
-    start_time = pkts[0]['time']
-    found_slots = set()
-
-    for p in pkts:
-        # Nearest expected slot index for this packet's actual time
-        raw_idx = (p['time'] - start_time) / INTRA_BURST_STEP_MS
-        idx = round(raw_idx)
-        # Only trust the slot match if it's close enough to a clean 40ms step
-        if abs(raw_idx - idx) * INTRA_BURST_STEP_MS <= SLOT_TOLERANCE_MS:
-            found_slots.add(idx)
-        else:
-            # Doesn't line up with expected spacing; still record its own
-            # slot so it's not falsely reported as "missing" on top of being odd.
-            found_slots.add(idx)
+    n = len(packets)
+    if n == 0:
+        return np.empty(0, dtype=BURST_DTYPE), np.empty(0, dtype=MISSING_DTYPE)
+
+    # Sort by (tx, seq, time): each burst becomes one contiguous, time-ordered run
+    order = np.lexsort((packets['time'], packets['seq'], packets['tx']))
+    tx = packets['tx'][order]
+    seq = packets['seq'][order]
+    times = packets['time'][order]
+
+    new_burst = (tx[1:] != tx[:-1]) | (seq[1:] != seq[:-1])
+    new_burst |= np.diff(times) > EXPECTED_BURST_SIZE * INTRA_BURST_STEP_MS
+    first = np.concatenate(([0], np.flatnonzero(new_burst) + 1))
+    sizes = np.diff(np.append(first, n))
+    last = first + sizes - 1
+    burst_of = np.repeat(np.arange(len(first)), sizes)
+    start_time = times[first]
+
+    # Nearest expected slot index for each packet's actual time. A packet that
+    # doesn't line up with a clean 40ms step (off by more than
+    # SLOT_TOLERANCE_MS) still claims its nearest slot, so it's not falsely
+    # reported as "missing" on top of being odd.
+    if fit:
+        # the grid is fitted on each TX's packets in time order, then
+        # mapped back to the (tx, seq, time) order used here
+        by_time = np.lexsort((times, tx))
+        back = np.empty_like(by_time)
+        back[by_time] = np.arange(n)
+        grid_n, grid_anchor, grid_period = (
+            a[back] for a in fit_slot_grids(tx[by_time], times[by_time], INTRA_BURST_STEP_MS))
+
+        # Where in the 50-slot burst cycle each TX's bursts usually start:
+        # the most common first-packet grid slot, modulo the burst size
+        n_first = grid_n[first]
+        cycle = pd.DataFrame({'tx': tx[first], 'r': n_first % EXPECTED_BURST_SIZE})
+        start_r = (cycle.groupby(['tx', 'r']).size().rename('count').reset_index()
+                   .sort_values(['tx', 'count', 'r'], ascending=[True, False, True])
+                   .drop_duplicates('tx').set_index('tx')['r'])
+        head_lost = (n_first - start_r.reindex(tx[first]).to_numpy()) % EXPECTED_BURST_SIZE
+
+        slot = grid_n - (n_first - head_lost)[burst_of]
+        slot0_time = grid_anchor[first] - head_lost * grid_period[first]
+        slot_period = grid_period[first]
+    else:
+        slot = np.rint((times - start_time[burst_of]) / INTRA_BURST_STEP_MS).astype(np.int64)
+        slot0_time = start_time
+        slot_period = np.full(len(first), INTRA_BURST_STEP_MS)
+
+    # Times are sorted within a burst, so slots are too: a slot is distinct
+    # when it differs from the previous packet's or starts a new burst
+    distinct = np.ones(n, dtype=bool)
+    distinct[1:] = (slot[1:] != slot[:-1]) | (burst_of[1:] != burst_of[:-1])
 
     # Burst should span at least the expected 40 slots (0..39), but if more
     # packets were actually seen (e.g. an extra strap packet), extend to cover them.
-    last_slot = max(EXPECTED_BURST_SIZE - 1, max(found_slots))
+    expected = np.maximum(EXPECTED_BURST_SIZE - 1, slot[last]) + 1
+    found_slots = np.bincount(burst_of[distinct], minlength=len(first))
+
+    # Report bursts in the order their first packet appears in the log
+    burst_order = np.argsort(np.minimum.reduceat(order, first), kind='stable')
+    position = np.empty_like(burst_order)
+    position[burst_order] = np.arange(len(burst_order))
+
+    bursts = np.empty(len(first), dtype=BURST_DTYPE)
+    bursts['tx'] = tx[first][burst_order]
+    bursts['seq'] = seq[first][burst_order]
+    bursts['first_time'] = start_time[burst_order]
+    bursts['last_time'] = times[last][burst_order]
+    bursts['found'] = sizes[burst_order]
+    bursts['expected'] = expected[burst_order]
+    bursts['missing'] = (expected - found_slots)[burst_order]
+
+    # Lay every burst's expected slots end to end, mark the ones a packet
+    # claimed, and whatever is left unmarked is missing
+    offsets = np.concatenate(([0], np.cumsum(bursts['expected'])[:-1]))
+    present = np.zeros(int(bursts['expected'].sum()), dtype=bool)
+    present[offsets[position[burst_of[distinct]]] + slot[distinct]] = True
+
+    holes = np.flatnonzero(~present)
+    hole_burst = np.searchsorted(offsets, holes, side='right') - 1
+    hole_slot = holes - offsets[hole_burst]
 
-    missing = []
-    for idx in range(0, last_slot + 1):
-        if idx not in found_slots:
-            expected_time = start_time + idx * INTRA_BURST_STEP_MS
-            missing.append({
-                'seq': seq,
-                'slot': idx,
-                'expected_time': round(expected_time, 3),
-            })
+    missing = np.empty(len(holes), dtype=MISSING_DTYPE)
+    missing['tx'] = bursts['tx'][hole_burst]
+    missing['seq'] = bursts['seq'][hole_burst]
+    missing['slot'] = hole_slot
+    missing['expected_time'] = (slot0_time[burst_order][hole_burst]
+                                + hole_slot * slot_period[burst_order][hole_burst])
+    return bursts, missing
 
-    return missing, len(pkts), last_slot + 1
 
+def analyze_inter_burst(bursts):
+    """Check the gap between the end of each burst and the start of the same TX's next one."""
+    # in time order, not Seq order: Seq wraps every 256 bursts
+    by_seq = bursts[np.lexsort((bursts['first_time'], bursts['tx']))]
+    gaps = by_seq['first_time'][1:] - by_seq['last_time'][:-1]
+    same_tx = by_seq['tx'][1:] == by_seq['tx'][:-1]
 
-def analyze_inter_burst(groups):
-    """Check the gap between the end of each burst and the start of the next."""
     anomalies = []
-    seqs = sorted(groups.keys())
-    for i in range(len(seqs) - 1):
-        cur_seq, next_seq = seqs[i], seqs[i + 1]
-        cur_last_time = groups[cur_seq][-1]['time']
-        next_first_time = groups[next_seq][0]['time']
-        gap = next_first_time - cur_last_time
-
-        if abs(gap - INTER_BURST_GAP_MS) > GAP_TOLERANCE_MS:
-            anomalies.append({
-                'from_seq': cur_seq,
-                'to_seq': next_seq,
-                'gap_ms': round(gap, 3),
-                'expected_gap_ms': INTER_BURST_GAP_MS,
-                'extra_slots_unaccounted': round((gap - INTER_BURST_GAP_MS) / INTRA_BURST_STEP_MS, 2),
-            })
+    for i in np.flatnonzero(same_tx & (np.abs(gaps - INTER_BURST_GAP_MS) > GAP_TOLERANCE_MS)):
+        gap = float(gaps[i])
+        anomalies.append({
+            'tx': int(by_seq['tx'][i]),
+            'from_seq': int(by_seq['seq'][i]),
+            'to_seq': int(by_seq['seq'][i + 1]),
+            'gap_ms': round(gap, 3),
+            'expected_gap_ms': INTER_BURST_GAP_MS,
+            'extra_slots_unaccounted': round((gap - INTER_BURST_GAP_MS) / INTRA_BURST_STEP_MS, 2),
+        })
     return anomalies
 
 
+def tx_report(bursts, anomalies):
+    """
+    Per-TX loss and gap summary as a DataFrame indexed by tx: bursts, packets
+    found/expected/missing, PER (missing / expected) and gap anomalies.
+    """
+    report = pd.DataFrame({
+        'tx': bursts['tx'],
+        'found': bursts['found'],
+        'expected': bursts['expected'],
+        'missing': bursts['missing'],
+    }).groupby('tx').agg(
+        bursts=('found', 'size'),
+        found=('found', 'sum'),
+        expected=('expected', 'sum'),
+        missing=('missing', 'sum'),
+    )
+    report['per'] = (report['missing'] / report['expected']).round(4)
+    gaps = pd.Series([a['tx'] for a in anomalies], dtype=np.int64).value_counts()
+    report['gap_anomalies'] = gaps.reindex(report.index, fill_value=0).astype(np.int64)
+    return report
+
+
+class OnlineDetector:
+    """
+    Bounded-memory missing-packet detector for a log that never ends.
+
+    Only the bursts still open are kept, one per (tx, seq), each as its first
+    and last packet time plus a bitmask of the slots claimed so far; slots are
+    claimed as in analyze_bursts(fit=False), since a live burst has no later
+    packets to fit a grid on. A burst is finalized once log time
+    (the newest frame_time seen) is past its 50 x 40 ms window plus
+    GAP_TOLERANCE_MS; its missing slots go to on_missing, and the gap from the
+    same TX's previous burst is checked against INTER_BURST_GAP_MS, anomalies
+    going to on_gap. A packet for a (tx, seq) that was already finalized is
+    counted as late and dropped. Bursts are expired as log time advances, so
+    the result does not depend on how the packets are batched. Memory is
+    proportional to the number of active TXs, not to the length of the run,
+    and the work per packet is a dict lookup: open bursts are kept in
+    creation (i.e. log time) order, so expiring them only ever looks at the
+    oldest ones.
+    """
+
+    WINDOW_MS = EXPECTED_BURST_SIZE * INTRA_BURST_STEP_MS + GAP_TOLERANCE_MS
+
+    def __init__(self, on_missing=None, on_gap=None):
+        self.on_missing = on_missing or (lambda m: None)
+        self.on_gap = on_gap or (lambda a: None)
+        self.open = {}          # (tx, seq) -> [first_time, last_time, slot_mask, packets]
+        self.last_closed = {}   # tx -> (seq, last_time) of its last finalized burst
+        self.now = float('-inf')
+        self.packets = 0
+        self.bursts = 0
+        self.missing = 0
+        self.late = 0
+
+    def feed(self, records):
+        """Account a PDC_DTYPE array of new packets, in log order."""
+        for t, seq, tx in zip(records['time'].tolist(), records['seq'].tolist(),
+                              records['tx'].tolist()):
+            self.packets += 1
+            if t > self.now:
+                # expire as log time advances, not once per batch: Seq wraps
+                # every 256 bursts and the next (tx, seq) must find the old
+                # burst closed, however many packets one batch holds
+                self.now = t
+                self.expire()
+            key = (tx, seq)
+            burst = self.open.get(key)
+            if burst is None:
+                prev = self.last_closed.get(tx)
+                if prev is not None and prev[0] == seq and t - prev[1] <= self.WINDOW_MS:
+                    self.late += 1
+                    continue
+                self.open[key] = [t, t, 1, 1]
+            else:
+                slot = round((t - burst[0]) / INTRA_BURST_STEP_MS)
+                if slot < 0:
+                    # out-of-order packet earlier than the burst's first one
+                    burst[2] <<= -slot
+                    burst[0] = t
+                    slot = 0
+                burst[1] = max(burst[1], t)
+                burst[2] |= 1 << slot
+                burst[3] += 1
+
+    def expire(self, force=False):
+        """Finalize every open burst whose window has passed (all of them with force)."""
+        while self.open:
+            key = next(iter(self.open))
+            if not force and self.now - self.open[key][0] <= self.WINDOW_MS:
+                break
+            self._close(key, self.open.pop(key))
+
+    def _close(self, key, burst):
+        tx, seq = key
+        first_time, last_time, mask, _ = burst
+        self.bursts += 1
+
+        expected = max(EXPECTED_BURST_SIZE, mask.bit_length())
+        for slot in range(expected):
+            if not mask >> slot & 1:
+                self.missing += 1
+                self.on_missing({
+                    'tx': tx,
+                    'seq': seq,
+                    'slot': slot,
+                    'expected_time': round(first_time + slot * INTRA_BURST_STEP_MS, 3),
+                })
+
+        prev = self.last_closed.get(tx)
+        if prev is not None:
+            gap = first_time - prev[1]
+            if abs(gap - INTER_BURST_GAP_MS) > GAP_TOLERANCE_MS:
+                self.on_gap({
+                    'tx': tx,
+                    'from_seq': prev[0],
+                    'to_seq': seq,
+                    'gap_ms': round(gap, 3),
+                    'expected_gap_ms': INTER_BURST_GAP_MS,
+                    'extra_slots_unaccounted': round((gap - INTER_BURST_GAP_MS) / INTRA_BURST_STEP_MS, 2),
+                })
+        self.last_closed[tx] = (seq, last_time)
+
+
+def follow(args):
+    """--follow: run OnlineDetector over the log as it grows, until Ctrl-C."""
+    csv_file = open(args.csv, 'w', newline='') if args.csv else None
+    writer = csv.writer(csv_file) if csv_file else None
+    if writer:
+        writer.writerow(['tx', 'seq', 'packet_number_in_burst', 'expected_frame_time_ms'])
+
+    def on_missing(m):
+        print(f"MISSING TX {m['tx']} Seq {m['seq']:>3} | packet #{m['slot']:>2} of burst | "
+              f"expected frame time: {m['expected_time']}")
+        if writer:
+            writer.writerow([m['tx'], m['seq'], m['slot'], m['expected_time']])
+
+    def on_gap(a):
+        print(f"GAP TX {a['tx']} Seq {a['from_seq']} -> Seq {a['to_seq']}: gap = {a['gap_ms']} ms "
+              f"(expected {a['expected_gap_ms']} ms)")
+
+    detector = OnlineDetector(on_missing, on_gap)
+    print(f"Following {args.logfile} (Ctrl-C to stop)")
+    try:
+        for records in follow_pdc(args.logfile):
+            detector.feed(records)
+            if csv_file:
+                csv_file.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        detector.expire(force=True)
+        if csv_file:
+            csv_file.close()
+
+    print("-" * 32)
+    print(f"Total packets found:   {detector.packets}")
+    print(f"Total packets missing: {detector.missing} (in {detector.bursts} burst(s), "
+          f"{detector.late} late packet(s) dropped)")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Parse PDC log and identify missing packets.")
     parser.add_argument('logfile', nargs='?', default='logs/master_output.txt',
                          help='Path to the log file (default: logs/master_output.txt)')
     parser.add_argument('--csv', default=None,
                          help='Optional path to write a CSV of the missing packets')
+    parser.add_argument('--from', dest='t_from', type=float, default=None,
+                         help='Only analyse packets with frame_time >= this (ms)')
+    parser.add_argument('--to', dest='t_to', type=float, default=None,
+                         help='Only analyse packets with frame_time <= this (ms)')
+    parser.add_argument('--full', action='store_true',
+                         help='Reparse the whole log, ignoring the previous run\'s checkpoint')
+    parser.add_argument('--follow', action='store_true',
+                         help='Follow the growing log and report missing packets as bursts close')
+    parser.add_argument('--jobs', type=int, default=1,
+                         help='Parse the log in this many processes (0: one per core, default: 1)')
     args = parser.parse_args()
 
-    packets = parse_log(args.logfile)
-    if not packets:
+    if args.follow:
+        if os.path.isdir(args.logfile) or is_compressed(args.logfile):
+            parser.error("--follow needs the text log, not an archive directory or compressed log")
+        follow(args)
+        return
+
+    packets = parse_log(args.logfile, args.t_from, args.t_to, resume=not args.full,
+                        jobs=args.jobs or os.cpu_count())
+    if len(packets) == 0:
         print(f"No PDC packets found in {args.logfile}")
         return
 
-    groups = group_by_seq(packets)
+    bursts, all_missing = analyze_bursts(packets)
 
-    print(f"Parsed {len(packets)} PDC packets across {len(groups)} Seq burst(s).\n")
-    print(f"{'Seq':>5} {'Found':>6} {'Expected':>9} {'Missing':>8}")
-    print("-" * 32)
+    print(f"Parsed {len(packets)} PDC packets across {len(bursts)} (Tx, Seq) burst(s).\n")
+    print(f"{'Tx':>5} {'Seq':>5} {'Found':>6} {'Expected':>9} {'Missing':>8}")
+    print("-" * 38)
 
-    all_missing = []
-    for seq, pkts in groups.items():
-        missing, found_count, expected_count = analyze_burst(seq, pkts)
-        all_missing.extend(missing)
-        print(f"{seq:>5} {found_count:>6} {expected_count:>9} {len(missing):>8}")
+    for tx, seq, found_count, expected_count, missing_count in zip(
+            *(bursts[f].tolist() for f in ('tx', 'seq', 'found', 'expected', 'missing'))):
+        print(f"{tx:>5} {seq:>5} {found_count:>6} {expected_count:>9} {missing_count:>8}")
 
-    total_expected = sum(max(EXPECTED_BURST_SIZE, len(pkts)) for pkts in groups.values())
-    print("-" * 32)
+    print("-" * 38)
     print(f"Total packets found:   {len(packets)}")
     print(f"Total packets missing: {len(all_missing)}")
+
+    print("\n--- Per-TX loss and inter-burst gaps ---")
+    print(tx_report(bursts, analyze_inter_burst(bursts)).to_string())
     '''
     print("\n--- Missing packets (within-burst, by Seq / slot / expected time) ---")
-    if all_missing:
+    if len(all_missing):
         for m in all_missing:
-            print(f"Seq {m['seq']:>3} | packet #{m['slot']:>2} of burst | "
-                  f"expected frame time: {m['expected_time']}")
+            print(f"Tx {m['tx']:>3} Seq {m['seq']:>3} | packet #{m['slot']:>2} of burst | "
+                  f"expected frame time: {round(float(m['expected_time']), 3)}")
     else:
         print("None detected.")
 
     print("\n--- Inter-burst gap anomalies (Seq-to-Seq gap should be 400 ms) ---")
-    anomalies = analyze_inter_burst(groups)
+    anomalies = analyze_inter_burst(bursts)
     if anomalies:
         for a in anomalies:
-            print(f"Seq {a['from_seq']} -> Seq {a['to_seq']}: gap = {a['gap_ms']} ms "
+            print(f"Tx {a['tx']} Seq {a['from_seq']} -> Seq {a['to_seq']}: gap = {a['gap_ms']} ms "
                   f"(expected {a['expected_gap_ms']} ms) "
                   f"~{a['extra_slots_unaccounted']} extra 40ms slot(s) unaccounted for")
     else:
@@ -181,9 +451,9 @@ def main():
     if args.csv:
         with open(args.csv, 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(['seq', 'packet_number_in_burst', 'expected_frame_time_ms'])
-            for m in all_missing:
-                writer.writerow([m['seq'], m['slot'], m['expected_time']])
+            writer.writerow(['tx', 'seq', 'packet_number_in_burst', 'expected_frame_time_ms'])
+            for tx, seq, slot, expected_time in all_missing.tolist():
+                writer.writerow([tx, seq, slot, round(expected_time, 3)])
         print(f"\nMissing-packet details written to: {args.csv}")
 
 
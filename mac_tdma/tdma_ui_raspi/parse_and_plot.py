@@ -1,158 +1,204 @@
 #!/usr/bin/env python3
 """
-Parse master_output.txt and generate TDMA CSV and plot (SAFE VERSION)
+Parse master_output.txt and generate TDMA stats and plot (SAFE VERSION)
+
+The parsed records are cached beside the log (tdma_log.save_frame_cache) and
+reused while the log is unchanged; tdma.csv is only written with --csv.
 """
 
+import argparse
+import io
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
-import re
 import numpy as np
+from array import array
 from pathlib import Path
 
+from tdma_grid import fit_slot_grid
+from tdma_lines import open_log, parse_pdc
+from tdma_log import (
+    read_pdc_incremental, read_pdc_window, cache_key, load_frame_cache, save_frame_cache,
+)
+
 # ---- CONFIG ----
 MASTER_LOG_FILE = "logs/master_output.txt"
 CSV_FILE = "tdma.csv"
 
-# SAFETY LIMITS (prevents matplotlib freeze)
-'''
-MAX_ROWS = 100        # hard cap for plotting
-DOWNSAMPLE = 5         # vlines reduction factor
-OFFSET = 700          # wait for both clients to converge
-
-'''
-PDC_LINE_RE = re.compile(
-    r"PDC\s+([\d.]+)\s+Seq:(\d+)\s+Tx:(\d+)\s+Temp:(\d+)"
-)
+# Timeline output (drawing cost scales with these, not with the event count)
+PLOT_WIDTH_IN = 14
+PLOT_HEIGHT_IN = 6
+PLOT_DPI = 150
+GRID_MIN_SPACING_PX = 4
 
 first_msg_time = None  # will be set to first PDC frame_time
 
-def parse_master_log(log_file):
+PDC_COLUMNS = ["frame_time", "beacon", "seq", "tx_id", "temperature"]
+
+# Batch-based inter-frame timing (--batch-stats)
+BATCH_SIZE = 50                  # expected packets per iteration/batch
+PERIOD_MS = 40.0                 # expected period between packets of a batch
+TOLERANCE_MS = PERIOD_MS / 2.0   # 20 ms match window
+ANCHOR_BACKTRACK = 4             # slots a batch's first packet may be late by
+BATCH_STATS_CSV = "tdma_batch_stats.csv"
+MISSING_PACKETS_CSV = "tdma_missing_packets.csv"
+BATCH_STATS_COLUMNS = [
+    "tx_id", "batch", "received", "matched", "lost", "loss_pct",
+    "period_ms", "anchor_ms", "interval_mean_ms", "interval_p95_ms",
+]
+
+
+def iter_master_log(log_file):
+    """
+    Stream PDC records out of the log, one line at a time.
+
+    Yields (frame_time, seq, tx_id, temperature) tuples. frame_time is rebased
+    on the first PDC line as soon as it is seen, so the file is read exactly
+    once and never held in memory.
+    """
+    global first_msg_time
+    first_msg_time = None
+
+    with io.TextIOWrapper(open_log(log_file)) as f:
+        for line in f:
+            # PDC data (single consolidated line: PDC <time> Seq:<n> Tx:<n> Temp:<n>)
+            record = parse_pdc(line)
+            if record is None:
+                # anything else (e.g. bare "PDC 50860.737052" with no Seq/Tx/Temp) is skipped
+                continue
+
+            frame_time, seq, tx_id, temp = record
+            if first_msg_time is None:
+                first_msg_time = frame_time
+
+            yield frame_time - first_msg_time, seq, tx_id, temp
+
+
+def parse_master_log(log_file, bulk=True, t_from=None, t_to=None, resume=True, jobs=1):
+    """
+    Load every PDC record of the log into a DataFrame (PDC_COLUMNS).
+
+    bulk=True extracts the records block by block into typed columns (see
+    tdma_log.read_pdc); bulk=False goes through iter_master_log() line by line.
+    t_from/t_to (raw frame_time, ms) restrict the load to that window, using
+    the log's time index so the rest of the file is not read. Without a
+    window the bulk path resumes from the checkpoint left by the previous
+    run and only parses appended bytes (resume=False reparses everything).
+    log_file may also be an exporter --archive directory (bulk path only).
+    jobs > 1 splits the bulk parse over that many processes.
+    """
     if not Path(log_file).exists():
         print(f"Error: {log_file} not found")
-        return []
-
-    records = []
-
-    with open(log_file, "r") as f:
-        lines = f.readlines()
-
-    # -------------------------------------------------
-    # Find first reference time (first PDC frame_time)
-    # -------------------------------------------------
-    global first_msg_time
-    for raw_line in lines:
-        line = raw_line.strip()
-
-        if not line:
-            continue
-
-        m = PDC_LINE_RE.search(line)
-        if m:
-            first_msg_time = float(m.group(1))
-            break
-
-    # -------------------------------------------------
-    # Parse log — one PDC record per line now
-    # -------------------------------------------------
-    for raw_line in lines:
-        line = raw_line.strip()
-
-        if not line:
-            continue
-
-        
-        # PDC data (single consolidated line: PDC <time> Seq:<n> Tx:<n> Temp:<n>)
-        m = PDC_LINE_RE.search(line)
-        if m:
-            records.append({
-                "frame_time": float(m.group(1)) - first_msg_time,
-                "beacon": False,
-                "seq": int(m.group(2)),
-                "tx_id": int(m.group(3)),
-                "temperature": int(m.group(4)),
-            })
-            continue
-
-        # anything else (e.g. bare "PDC 50860.737052" with no Seq/Tx/Temp) is skipped
-
-    return records
+        return pd.DataFrame(columns=PDC_COLUMNS)
 
-def save_to_csv(records, csv_file):
-    if not records:
+    windowed = t_from is not None or t_to is not None
+    if bulk or windowed:
+        global first_msg_time
+        if windowed:
+            pdc = read_pdc_window(log_file, t_from, t_to, jobs=jobs)
+        else:
+            pdc = read_pdc_incremental(log_file, resume=resume, jobs=jobs)
+        first_msg_time = float(pdc["time"][0]) if len(pdc) else None
+
+        return pd.DataFrame({
+            "frame_time": pdc["time"] - (first_msg_time or 0.0),
+            "beacon": np.zeros(len(pdc), dtype=bool),
+            "seq": pdc["seq"],
+            "tx_id": pdc["tx"],
+            "temperature": pdc["temp"],
+        })
+
+    # typed columns instead of one dict per record
+    frame_time = array("d")
+    seq = array("q")
+    tx_id = array("q")
+    temperature = array("q")
+
+    for t, s, tx, temp in iter_master_log(log_file):
+        frame_time.append(t)
+        seq.append(s)
+        tx_id.append(tx)
+        temperature.append(temp)
+
+    return pd.DataFrame({
+        "frame_time": np.frombuffer(frame_time, dtype=np.float64),
+        "beacon": np.zeros(len(frame_time), dtype=bool),
+        "seq": np.frombuffer(seq, dtype=np.int64),
+        "tx_id": np.frombuffer(tx_id, dtype=np.int64),
+        "temperature": np.frombuffer(temperature, dtype=np.int64),
+    })
+
+def save_to_csv(df, csv_file):
+    if df.empty:
         print("No records to save")
         return False
 
-    df = pd.DataFrame(records)
     df.to_csv(csv_file, index=False)
 
-    print(f"Saved {len(records)} records to {csv_file}")
+    print(f"Saved {len(df)} records to {csv_file}")
     return True
 
 
-def plot_tdma_timeline(csv_file):
-    if not Path(csv_file).exists():
-        print(f"Error: {csv_file} not found")
-        return
+def bin_events(time_ms, n_bins, span_ms):
+    """Pixel-column index of every event, one column per span_ms / n_bins."""
+    col = (time_ms * (n_bins / span_ms)).astype(np.int64)
+    return np.unique(np.clip(col, 0, n_bins - 1))
 
-    df = pd.read_csv(csv_file)
 
+def plot_tdma_timeline(df):
+    """
+    Render the timeline at the output resolution: events are binned per pixel
+    column and per TX before drawing, so each TX is one LineCollection of at
+    most PLOT_WIDTH_IN * PLOT_DPI segments and the frame grid is a single
+    collection, whatever the number of events.
+    """
     if len(df) == 0:
         print("No data found")
         return
 
-    df = df.sort_values("frame_time")
-
-    # -------------------------------------------------
-    # DEBUG LIMIT
-    # -------------------------------------------------
-    # select df max rows with an offset
-   # df = df.head(MAX_ROWS + OFFSET)
+    frame_time = df["frame_time"].to_numpy(dtype=np.float64)
+    beacon = df["beacon"].to_numpy(dtype=bool)
 
-    beacon_df = df[df["beacon"] == True].copy()
-    pdc_df = df[df["beacon"] == False].copy()
+    t0 = frame_time.min()
+    time_ms = frame_time - t0
+    span_ms = max(float(time_ms.max()), 1.0)
 
-    t0 = df["frame_time"].min()
+    n_bins = PLOT_WIDTH_IN * PLOT_DPI      # one bin per output pixel column
+    bin_ms = span_ms / n_bins
 
-    df["time_ms"] = df["frame_time"] - t0
-    beacon_df["time_ms"] = beacon_df["frame_time"] - t0
-    pdc_df["time_ms"] = pdc_df["frame_time"] - t0
-
-    # Clean tx_id
-    pdc_df["tx_id"] = pdc_df["tx_id"].fillna(-1).astype(int)
-
-    plt.figure(figsize=(14, 6))
+    fig, ax = plt.subplots(figsize=(PLOT_WIDTH_IN, PLOT_HEIGHT_IN))
 
     # -------------------------------------------------
-    # TX lines (SAFE DOWNSAMPLING)
+    # TX lines (one collection per TX, one segment per occupied pixel column)
     # -------------------------------------------------
-    if len(pdc_df) > 0:
-        tx_ids = sorted(pdc_df["tx_id"].unique())
-        cmap = plt.colormaps["tab10"]
-
-        color_map = {tx: cmap(i % 10) for i, tx in enumerate(tx_ids)}
-
-        for tx in tx_ids:
-            subset = pdc_df[pdc_df["tx_id"] == tx]
+    pdc = ~beacon
+    if pdc.any():
+        tx_id = df["tx_id"].to_numpy()[pdc]
+        tx_id = np.where(pd.isna(tx_id), -1, tx_id).astype(np.int64)
+        pdc_ms = time_ms[pdc]
 
-            # DOWN SAMPLE (CRITICAL FIX)
-            #subset = subset.iloc[::DOWNSAMPLE]
+        tx_ids = np.unique(tx_id)
+        cmap = plt.colormaps["tab10"]
 
-            plt.vlines(
-                subset["time_ms"],
+        for i, tx in enumerate(tx_ids.tolist()):
+            cols = bin_events(pdc_ms[tx_id == tx], n_bins, span_ms)
+            ax.vlines(
+                (cols + 0.5) * bin_ms,
                 -0.2,
                 0.2,
                 label=f"TX {tx}",
-                colors=[color_map[tx]],
+                colors=[cmap(i % 10)],
                 linewidth=1
             )
 
     # -------------------------------------------------
     # Beacons
     # -------------------------------------------------
-    if len(beacon_df) > 0:
-        plt.scatter(
-            beacon_df["time_ms"],
-            [0.35] * len(beacon_df),
+    if beacon.any():
+        cols = bin_events(time_ms[beacon], n_bins, span_ms)
+        ax.scatter(
+            (cols + 0.5) * bin_ms,
+            np.full(len(cols), 0.35),
             marker="^",
             s=80,
             color="red",
@@ -161,43 +207,48 @@ def plot_tdma_timeline(csv_file):
         )
 
     # -------------------------------------------------
-    # Grid
+    # Grid (one collection; thinned to whole frames so that lines
+    # stay at least GRID_MIN_SPACING_PX pixels apart)
     # -------------------------------------------------
-    max_time = df["time_ms"].max()
     FRAME_PERIOD_MS = 2000
-
-    for t in np.arange(0, max_time + FRAME_PERIOD_MS, FRAME_PERIOD_MS):
-        plt.axvline(x=t, linestyle=":", linewidth=0.8, alpha=0.4)
+    step = FRAME_PERIOD_MS * max(1, int(np.ceil(GRID_MIN_SPACING_PX * bin_ms / FRAME_PERIOD_MS)))
+    ax.vlines(
+        np.arange(0, span_ms + step, step),
+        0,
+        1,
+        transform=ax.get_xaxis_transform(),
+        linestyles=":",
+        linewidth=0.8,
+        alpha=0.4
+    )
 
     # -------------------------------------------------
     # Labels
     # -------------------------------------------------
-    plt.xlabel("Time (ms)")
-    plt.title("TDMA Timeline")
+    ax.set_xlabel("Time (ms)")
+    ax.set_title("TDMA Timeline")
 
-    plt.yticks([])
-    plt.grid(axis="x", alpha=0.3)
-    plt.legend(loc="upper left")
+    ax.set_yticks([])
+    ax.grid(axis="x", alpha=0.3)
+    ax.legend(loc="upper left")
 
-    plt.tight_layout()
+    fig.tight_layout()
 
     # -------------------------------------------------
     # SAVE FIRST (IMPORTANT)
     # -------------------------------------------------
     out_file = "tdma_timeline.png"
-    plt.savefig(out_file, dpi=150, bbox_inches="tight")
+    fig.savefig(out_file, dpi=PLOT_DPI, bbox_inches="tight")
 
     print(f"Saved plot to {out_file}")
 
     # Optional (safe now)
     #plt.show()
     # Avoid freeze in some backends
-    plt.close()
+    plt.close(fig)
 
   
 def print_seq_stats(df):
-    BATCH_SIZE = 50  # expected packets per iteration/batch
-
     # remove beacon rows
     pdc = df[df["beacon"] == False].copy()
     pdc = pdc.dropna(subset=["seq", "tx_id"])
@@ -226,160 +277,126 @@ def print_seq_stats(df):
     else:
         print(dup.to_string())
 
-# -------------------------------------------------
-    # Batch-based inter-frame timing (50 packets = 1 iteration)
-    # Expected period = 40 ms, tolerance = ±half-period for matching
-    # -------------------------------------------------
-    PERIOD_MS   = 40.0
-    TOLERANCE   = PERIOD_MS / 2.0   # 20 ms match window
-    '''
-    print(f"\n=== Batch inter-frame timing (batch_size={BATCH_SIZE}, period={PERIOD_MS} ms) ===")
-
-    pdc_sorted = pdc.sort_values(["tx_id", "frame_time"]).copy()
-    pdc_sorted["batch"] = (
-        pdc_sorted.groupby("tx_id").cumcount() // BATCH_SIZE
-    )
-    # discard last batch of each tx
-    # Drop the last batch for each TX (incomplete / stop-emulation artefact)
-    last_batch_per_tx = pdc_sorted.groupby("tx_id")["batch"].transform("max")
-    pdc_sorted = pdc_sorted[pdc_sorted["batch"] < last_batch_per_tx]
-     # DEBUG
-    print("\n=== Batch assignment debug ===")
-    print(pdc_sorted.groupby(["tx_id", "batch"]).size().to_string())
-    
-    # Drop the last batch for each TX
-    last_batch_per_tx = pdc_sorted.groupby("tx_id")["batch"].transform("max")
-    pdc_sorted = pdc_sorted[pdc_sorted["batch"] < last_batch_per_tx]
-    
-    print(f"\nAfter last-batch drop: {len(pdc_sorted)} rows remaining")
-    stats_rows  = []
-    loss_rows   = []   # one row per missing slot
-
-
-    for (tx_id, batch_idx), group in pdc_sorted.groupby(["tx_id", "batch"]):
-        times    = np.sort(group["frame_time"].values)
-        received = len(times)
-
-        if received == 0:
+def batch_timing_stats(pdc):
+    """
+    Batch-based inter-frame timing (BATCH_SIZE packets = 1 iteration) for all TXs.
+
+    Each TX's packets are cut into batches of BATCH_SIZE in time order (the
+    last, usually incomplete, batch is dropped) and numbered with their slot
+    on the TX's fitted grid (tdma_grid.fit_slot_grid), which follows clock
+    drift. The slot-0 anchor of a batch is the candidate (a packet's grid
+    slot, or one up to ANCHOR_BACKTRACK slots before it) whose BATCH_SIZE-slot
+    window holds the most packets; window counts come from two searchsorted()
+    calls per candidate. A packet then matches its grid slot if it is within
+    TOLERANCE_MS of the fitted slot time (closest packet wins a slot).
+
+    Returns (stats_df, loss_df): one row per (tx_id, batch) and one row per
+    missing slot.
+    """
+    stats_parts = []
+    loss_parts = []
+
+    for tx_id, g in pdc.groupby("tx_id", sort=True):
+        t = np.sort(g["frame_time"].to_numpy(dtype=np.float64))
+        n, grid_time, period = fit_slot_grid(t, PERIOD_MS)
+
+        batch = np.arange(len(t)) // BATCH_SIZE
+        # Drop the last batch for each TX (incomplete / stop-emulation artefact)
+        keep = batch < batch[-1]
+        t, batch, n, grid_time, period = t[keep], batch[keep], n[keep], grid_time[keep], period[keep]
+        if len(t) == 0:
             continue
+        nb = int(batch[-1]) + 1
+        batch_start = np.arange(nb) * BATCH_SIZE
+        batch_end = batch_start + BATCH_SIZE
 
         # ---------------------------------------------------
-        # Estimate actual period from this batch's data.
-        # Use median of deltas to be robust against gaps.
-        # Fall back to PERIOD_MS if too few packets.
+        # Anchor: every packet's grid slot, backed off by
+        # 0..ANCHOR_BACKTRACK slots, is a slot-0 candidate; the one whose
+        # BATCH_SIZE slots hold the most of the batch's packets wins
+        # (first candidate on ties)
         # ---------------------------------------------------
-        if received >= 2:
-            deltas          = np.diff(times)
-            # Only use deltas close to expected period (ignore multi-slot gaps)
-            clean_deltas    = deltas[deltas <= PERIOD_MS * 1.8]
-            measured_period = float(np.median(clean_deltas)) if len(clean_deltas) else PERIOD_MS
-        else:
-            measured_period = PERIOD_MS
+        k = np.arange(ANCHOR_BACKTRACK + 1)
+        cand = (n[:, None] - k[None, :]).ravel()
+        cand_of = np.repeat(np.arange(len(t)), len(k))
+        cand_batch = batch[cand_of]
+        lo = np.maximum(np.searchsorted(n, cand, side="left"), batch_start[cand_batch])
+        hi = np.minimum(np.searchsorted(n, cand + BATCH_SIZE - 1, side="right"), batch_end[cand_batch])
+        hits = pd.Series(np.maximum(hi - lo, 0))
+        best = hits.groupby(cand_batch).idxmax().to_numpy()
+        slot0 = cand[best]
+        ref = cand_of[best]             # packet whose fit places the batch's grid
+        anchor = grid_time[ref] + (slot0 - n[ref]) * period[ref]
+        batch_period = period[ref]
 
         # ---------------------------------------------------
-        # Find best anchor: try every received packet as slot-0
-        # and pick the one that maximises matches.
+        # Slot matching on the fitted grid
         # ---------------------------------------------------
-        def count_matches(anchor, period):
-            matched = 0
-            used    = [False] * received
-            for k in range(BATCH_SIZE):
-                exp = anchor + k * period
-                for i, t in enumerate(times):
-                    if not used[i] and abs(t - exp) <= TOLERANCE:
-                        used[i] = True
-                        matched += 1
-                        break
-            return matched
-
-        best_anchor  = times[0]
-        best_matches = count_matches(times[0], measured_period)
-
-        for candidate in times[1:]:
-            # candidate could be slot k — try offsets back
-            for k in range(1, min(5, BATCH_SIZE)):
-                anchor_try = candidate - k * measured_period
-                m = count_matches(anchor_try, measured_period)
-                if m > best_matches:
-                    best_matches = m
-                    best_anchor  = anchor_try
-
-        expected_times = best_anchor + np.arange(BATCH_SIZE) * measured_period
+        slot = n - slot0[batch]
+        offset = t - grid_time
+        ok = (slot >= 0) & (slot < BATCH_SIZE) & (np.abs(offset) <= TOLERANCE_MS)
+
+        cell = batch * BATCH_SIZE + slot
+        idx = np.flatnonzero(ok)
+        idx = idx[np.lexsort((np.abs(offset[idx]), cell[idx]))]
+        winner = idx[np.concatenate(([True], cell[idx][1:] != cell[idx][:-1]))] if len(idx) else idx
+
+        present = np.zeros(nb * BATCH_SIZE, dtype=bool)
+        present[cell[winner]] = True
+        matched = present.reshape(nb, BATCH_SIZE).sum(axis=1)
+
+        holes = np.flatnonzero(~present)
+        hole_batch, hole_slot = np.divmod(holes, BATCH_SIZE)
+        loss_parts.append(pd.DataFrame({
+            "tx_id": tx_id,
+            "batch": hole_batch,
+            "slot": hole_slot,
+            "expected_ms": np.round(anchor[hole_batch] + hole_slot * batch_period[hole_batch], 3),
+        }))
 
         # ---------------------------------------------------
-        # Now do the actual matching with the best anchor
+        # Inter-packet intervals within each batch
         # ---------------------------------------------------
-        used        = [False] * received
-        slot_status = []
-
-        for slot_idx, exp_t in enumerate(expected_times):
-            best_i    = None
-            best_dist = np.inf
-
-            for i, t in enumerate(times):
-                if used[i]:
-                    continue
-                dist = abs(t - exp_t)
-                if dist < best_dist and dist <= TOLERANCE:
-                    best_dist = dist
-                    best_i    = i
-
-            if best_i is not None:
-                used[best_i] = True
-                slot_status.append({
-                    "slot":        slot_idx,
-                    "expected_ms": round(exp_t,           3),
-                    "actual_ms":   round(times[best_i],   3),
-                    "offset_ms":   round(times[best_i] - exp_t, 3),
-                    "matched":     True,
-                })
-            else:
-                slot_status.append({
-                    "slot":        slot_idx,
-                    "expected_ms": round(exp_t, 3),
-                    "actual_ms":   None,
-                    "offset_ms":   None,
-                    "matched":     False,
-                })
-                loss_rows.append({
-                    "tx_id":       tx_id,
-                    "batch":       batch_idx,
-                    "slot":        slot_idx,
-                    "expected_ms": round(exp_t, 3),
-                })
-    if not stats_rows:
-        print("No batch data to summarise.")
-        return
-
-    stats_df = pd.DataFrame(stats_rows)
-    loss_df  = pd.DataFrame(loss_rows) if loss_rows else pd.DataFrame(
+        d = np.diff(t)
+        d_batch = batch[1:]
+        in_batch = d_batch == batch[:-1]
+        intervals = pd.Series(d[in_batch]).groupby(d_batch[in_batch])
+        interval_mean = intervals.mean().reindex(range(nb))
+        interval_p95 = intervals.quantile(0.95).reindex(range(nb))
+
+        stats_parts.append(pd.DataFrame({
+            "tx_id": tx_id,
+            "batch": np.arange(nb),
+            "received": np.bincount(batch, minlength=nb),
+            "matched": matched,
+            "lost": BATCH_SIZE - matched,
+            "loss_pct": np.round((BATCH_SIZE - matched) * 100.0 / BATCH_SIZE, 2),
+            "period_ms": np.round(batch_period, 3),
+            "anchor_ms": np.round(anchor, 3),
+            "interval_mean_ms": np.round(interval_mean.to_numpy(), 3),
+            "interval_p95_ms": np.round(interval_p95.to_numpy(), 3),
+        }))
+
+    stats_df = pd.concat(stats_parts, ignore_index=True) if stats_parts else pd.DataFrame(
+        columns=BATCH_STATS_COLUMNS
+    )
+    loss_df = pd.concat(loss_parts, ignore_index=True) if loss_parts else pd.DataFrame(
         columns=["tx_id", "batch", "slot", "expected_ms"]
     )
+    return stats_df, loss_df
 
-    # -------------------------------------------------
-    # Cross-batch summary per TX
-    # -------------------------------------------------
-    print("\n=== Per-TX batch summary ===")
-    for tx_id, g in stats_df.groupby("tx_id"):
-        valid = g.dropna(subset=["interval_mean_ms"])
-        print(
-            f"  TX {tx_id} | batches={len(g)} | "
-            f"avg_loss={g['loss_pct'].mean():.1f}% | "
-            f"mean_jitter={valid['interval_mean_ms'].mean():.2f} ms | "
-            f"p95_max={valid['interval_p95_ms'].max():.2f} ms"
-        )
 
-    # -------------------------------------------------
-    # Save CSVs
-    # -------------------------------------------------
-    stats_csv = "tdma_batch_stats.csv"
-    loss_csv  = "tdma_missing_packets.csv"
+def print_batch_stats(df, stats_csv=BATCH_STATS_CSV, loss_csv=MISSING_PACKETS_CSV):
+    pdc = df[df["beacon"] == False].dropna(subset=["seq", "tx_id"])
+    pdc = pdc.astype({"tx_id": int})
 
-    stats_df.to_csv(stats_csv, index=False)
-    loss_df.to_csv(loss_csv,   index=False)
+    print(f"\n=== Batch inter-frame timing (batch_size={BATCH_SIZE}, period={PERIOD_MS} ms) ===")
+
+    stats_df, loss_df = batch_timing_stats(pdc)
+    if stats_df.empty:
+        print("No batch data to summarise.")
+        return
 
-    print(f"\nSaved batch stats    -> {stats_csv}")
-    print(f"Saved missing packets -> {loss_csv}  ({len(loss_df)} missing slots)")
     # -------------------------------------------------
     # Cross-batch summary per TX
     # -------------------------------------------------
@@ -394,35 +411,67 @@ def print_seq_stats(df):
         )
 
     # -------------------------------------------------
-    # Save stats CSV
+    # Save CSVs
     # -------------------------------------------------
-    stats_csv = "tdma_batch_stats.csv"
     stats_df.to_csv(stats_csv, index=False)
-    print(f"\nSaved batch stats -> {stats_csv}")
-    '''
-
+    loss_df.to_csv(loss_csv, index=False)
 
-def main():
-    print(f"Parsing {MASTER_LOG_FILE}...")
+    print(f"\nSaved batch stats    -> {stats_csv}")
+    print(f"Saved missing packets -> {loss_csv}  ({len(loss_df)} missing slots)")
 
-    records = parse_master_log(MASTER_LOG_FILE)
 
-    if not records:
+def main():
+    parser = argparse.ArgumentParser(description="Parse the master log into TDMA stats and a timeline plot.")
+    parser.add_argument("logfile", nargs="?", default=MASTER_LOG_FILE)
+    parser.add_argument("--from", dest="t_from", type=float, default=None,
+                        help="Only load PDC records with frame_time >= this (ms)")
+    parser.add_argument("--to", dest="t_to", type=float, default=None,
+                        help="Only load PDC records with frame_time <= this (ms)")
+    parser.add_argument("--full", action="store_true",
+                        help="Reparse the whole log, ignoring the previous run's checkpoint and cache")
+    parser.add_argument("--csv", nargs="?", const=CSV_FILE, default=None,
+                        help=f"Also export the records as CSV (default path: {CSV_FILE})")
+    parser.add_argument("--batch-stats", action="store_true",
+                        help=f"Run the batch inter-frame timing analysis "
+                             f"({BATCH_STATS_CSV}, {MISSING_PACKETS_CSV})")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Parse the log in this many processes (0: one per core, default: 1)")
+    args = parser.parse_args()
+
+    windowed = args.t_from is not None or args.t_to is not None
+
+    df = None
+    if not windowed and not args.full:
+        df = load_frame_cache(args.logfile)
+        if df is not None:
+            print(f"Loaded cached records for {args.logfile}")
+
+    if df is None:
+        print(f"Parsing {args.logfile}...")
+        key = cache_key(args.logfile)
+        df = parse_master_log(args.logfile, t_from=args.t_from, t_to=args.t_to,
+                              resume=not args.full, jobs=args.jobs or os.cpu_count())
+        if not windowed and not df.empty:
+            save_frame_cache(args.logfile, df, key)
+
+    if df.empty:
         print("No records found")
         return
 
-    df = pd.DataFrame(records)
-
-    print(f"Found {len(records)} TDMA events")
+    print(f"Found {len(df)} TDMA events")
 
     print_seq_stats(df)
 
-    print(f"Saving CSV -> {CSV_FILE}")
+    if args.batch_stats:
+        print_batch_stats(df)
+
+    if args.csv:
+        print(f"Saving CSV -> {args.csv}")
+        save_to_csv(df, args.csv)
 
-    if save_to_csv(records, CSV_FILE):
-        print("Generating plot...")
-        plot_tdma_timeline(CSV_FILE)
-        print("Done")
+    print("Generating plot...")
+    plot_tdma_timeline(df)
+    print("Done")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Batch analysis of an archive of per-run master logs.
+
+metrics.py and distances.py look at one log at a time. This runs the same
+analysis over every log in one or more directories or glob patterns, one
+run per worker process, and writes a single table with one row per run and
+TX: bursts, packets found/expected/missing (missing slots from
+metrics.analyze_bursts), PER, inter-burst gap anomalies and the interval
+jitter percentiles of tdma_sketch.IntervalStats.
+
+Each run's rows are cached (--cache, default tdma_batch_cache.json) under
+the log's tdma_log.cache_key(), i.e. its path, size and mtime. A run whose
+log is unchanged since the last batch is taken from the cache instead of
+being parsed again, so re-running over a growing archive only analyses the
+new and modified logs.
+
+Usage:
+    python3 tdma_batch.py logs/archive/ ["logs/2026-*/*.txt" ...] [--out tdma_batch.csv]
+                          [--pattern "*.txt" ...] [--jobs N] [--cache FILE] [--no-cache]
+
+Logs may be gzip'ed or zstd'ed (see tdma_lines.open_log).
+"""
+
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from metrics import INTRA_BURST_STEP_MS, analyze_bursts, analyze_inter_burst, tx_report
+from tdma_log import cache_key, read_pdc
+from tdma_sketch import IntervalStats
+
+BATCH_CSV = "tdma_batch.csv"
+BATCH_CACHE = "tdma_batch_cache.json"
+LOG_PATTERNS = ["*.txt", "*.txt.gz", "*.txt.zst"]
+# bump when the analysis or the columns change, so cached rows are redone
+CACHE_VERSION = 1
+
+BATCH_COLUMNS = [
+    "run", "tx", "bursts", "found", "expected", "missing", "per", "gap_anomalies",
+    "intervals", "jitter_p50_ms", "jitter_p95_ms", "jitter_p99_ms",
+]
+
+
+def find_logs(specs, patterns=LOG_PATTERNS):
+    """Logs named by specs (directories, matched with patterns, or globs), sorted, without duplicates."""
+    found = set()
+    for spec in specs:
+        if os.path.isdir(spec):
+            found.update(str(p) for pattern in patterns for p in Path(spec).glob(pattern) if p.is_file())
+        else:
+            found.update(p for p in glob.glob(spec, recursive=True) if os.path.isfile(p))
+    return sorted(found)
+
+
+def analyze_run(path):
+    """Per-TX rows (dicts with BATCH_COLUMNS) for one log."""
+    packets = read_pdc(path)
+    if len(packets) == 0:
+        return []
+
+    bursts, _ = analyze_bursts(packets)
+    report = tx_report(bursts, analyze_inter_burst(bursts))
+
+    stats = IntervalStats(INTRA_BURST_STEP_MS)
+    stats.feed(packets)
+    stats.finish()
+    jitter = stats.report().drop(index="all")
+
+    report = report.join(jitter, how="left")
+    report.insert(0, "run", path)
+    report = report.reset_index()
+    return report.reindex(columns=BATCH_COLUMNS).to_dict("records")
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("runs", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(path, runs):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "runs": runs}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not write the cache {path}: {e}")
+
+
+def run_batch(logs, jobs=None, cache_path=BATCH_CACHE):
+    """
+    Analyse logs (cached runs excepted) in a pool of jobs processes and
+    return the aggregate DataFrame. Runs that fail are reported and left out.
+    """
+    runs = load_cache(cache_path) if cache_path else {}
+    keys = {log: cache_key(log) for log in logs}
+    todo = [log for log in logs
+            if runs.get(os.path.abspath(log), {}).get("key") != keys[log]]
+    print(f"{len(logs)} run(s): {len(logs) - len(todo)} cached, {len(todo)} to analyse")
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(analyze_run, log): log for log in todo}
+            for done, future in enumerate(as_completed(futures), 1):
+                log = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:  # one bad log must not sink the batch
+                    print(f"[{done}/{len(todo)}] {log}: failed ({e})")
+                    continue
+                runs[os.path.abspath(log)] = {"key": keys[log], "rows": rows}
+                print(f"[{done}/{len(todo)}] {log}: {len(rows)} TX(s)")
+        if cache_path:
+            save_cache(cache_path, runs)
+
+    rows = [row for log in logs for row in runs.get(os.path.abspath(log), {}).get("rows", [])]
+    return pd.DataFrame(rows, columns=BATCH_COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse every log of an archive into one per-run, per-TX table.")
+    parser.add_argument("inputs", nargs="+", help="Directories of logs and/or glob patterns")
+    parser.add_argument("--pattern", nargs="+", default=LOG_PATTERNS,
+                        help=f"Logs to take from a directory (default: {' '.join(LOG_PATTERNS)})")
+    parser.add_argument("--out", default=BATCH_CSV, help=f"Aggregate CSV (default: {BATCH_CSV})")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Worker processes (default: 0, one per core)")
+    parser.add_argument("--cache", default=BATCH_CACHE,
+                        help=f"Per-run result cache (default: {BATCH_CACHE})")
+    parser.add_argument("--no-cache", action="store_true", help="Analyse every run again")
+    args = parser.parse_args()
+
+    logs = find_logs(args.inputs, args.pattern)
+    if not logs:
+        parser.error(f"no logs found in {args.inputs}")
+
+    cache = args.cache
+    if args.no_cache:
+        try:
+            os.remove(cache)
+        except OSError:
+            pass
+    table = run_batch(logs, args.jobs or os.cpu_count(), cache)
+
+    table.to_csv(args.out, index=False)
+    print(table.to_string(index=False))
+    print(f"Wrote {len(table)} row(s) from {table['run'].nunique()} run(s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
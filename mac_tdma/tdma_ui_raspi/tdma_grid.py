@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Per-TX slot grid estimation for the TDMA analysis scripts.
+
+A PT sends on a 40 ms slot grid, but its modem clock drifts against the
+master's, so a grid laid out with an exact 40 ms step from the first packet
+slowly walks off the real one and a lost first packet shifts it by a whole
+slot. fit_slot_grid() instead fits the grid to all of a TX's packets:
+
+  1. every inter-packet delta of a whole number of nominal slots gives a
+     per-step period estimate; their rolling median is the local period,
+  2. deltas are converted to whole slot steps with that local period, which
+     numbers every packet with its grid slot n,
+  3. the rolling median of the residual t - (t0 + n * P) is the local phase.
+
+Rolling medians make the fit robust to jitter outliers and to the long gaps
+left by lost packets, and let it follow drift. Everything is vectorised
+(pandas' rolling median), so a full-day log fits in seconds.
+"""
+
+import numpy as np
+import pandas as pd
+
+NOMINAL_PERIOD_MS = 40.0
+FIT_WINDOW = 501        # packets per rolling median
+MAX_FIT_STEP = 64       # longer deltas (in slots) are too coarse to refine the period
+STEP_TOLERANCE = 0.25   # of a period: how far from a whole step a delta may be
+
+
+def fit_slot_grid(t, nominal=NOMINAL_PERIOD_MS, window=FIT_WINDOW):
+    """
+    Fit the slot grid of one TX's sorted packet times t.
+
+    Returns (n, anchor, period) arrays, one entry per packet: n is the
+    packet's grid slot number (0 for the first packet), anchor the fitted
+    time of that slot and period the local slot period, so that slot m near
+    packet i is expected at anchor[i] + (m - n[i]) * period[i].
+    """
+    t = np.asarray(t, dtype=np.float64)
+    if len(t) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+    d = np.diff(t)
+    k = np.rint(d / nominal)
+    valid = (k >= 1) & (k <= MAX_FIT_STEP) & (np.abs(d - k * nominal) <= STEP_TOLERANCE * nominal)
+
+    # 1. local period: rolling median of the per-step estimates, carried to
+    #    every delta (and packet) from the nearest valid one
+    step_period = pd.Series(np.where(valid, d / np.where(k > 0, k, 1), np.nan))
+    local = step_period.dropna().rolling(window, center=True, min_periods=1).median()
+    local = local.reindex(step_period.index).ffill().bfill().fillna(nominal).to_numpy()
+
+    # 2. grid slot numbers
+    steps = np.maximum(np.rint(d / local), 0).astype(np.int64)
+    n = np.concatenate(([0], np.cumsum(steps)))
+
+    # 3. local phase on a single reference period P
+    P = float(np.median(local)) if len(local) else nominal
+    resid = t - t[0] - n * P
+    phase = pd.Series(resid).rolling(window, center=True, min_periods=1).median().to_numpy()
+
+    anchor = t[0] + n * P + phase
+    period = np.concatenate((local[:1], local)) if len(local) else np.full(1, nominal)
+    return n, anchor, period
+
+
+def fit_slot_grids(tx, t, nominal=NOMINAL_PERIOD_MS, window=FIT_WINDOW):
+    """
+    fit_slot_grid() for every TX at once. tx and t must be sorted by
+    (tx, t); returns (n, anchor, period) aligned with them.
+    """
+    n = np.empty(len(t), dtype=np.int64)
+    anchor = np.empty(len(t))
+    period = np.empty(len(t))
+    bounds = np.concatenate(([0], np.flatnonzero(tx[1:] != tx[:-1]) + 1, [len(t)]))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        n[lo:hi], anchor[lo:hi], period[lo:hi] = fit_slot_grid(t[lo:hi], nominal, window)
+    return n, anchor, period
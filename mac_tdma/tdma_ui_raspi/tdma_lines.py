@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Line parser for the master's log, shared by the TDMA tools.
+
+Besides the PDC line the analysis is built on, the master prints a few
+other lines worth reading (firmware format in brackets):
+
+    pdc             PDC <frame_time> Seq:<seq> Tx:<tx> Temp:<temp>
+    beacon          Beacon fired: frame_time=<ms>
+    enqueue_drop    PDC ENQUEUE DROP count=<n> ret=<err>
+    assoc_slots     Assigned client <id> slots [<first> .. <last>]
+    assoc_message   Received Association Request|Response|Release message:
+    rssi_results    RSSI scanning results (meas #<n> mdm time <ticks>):
+    rssi_done       RSSI scan done. Found <n> free, <n> possible and <n> busy channels.
+    rssi_channel    Best channel: <channel>
+
+and a lot of lines nobody reads (association IE dumps, RSSI scan tables).
+parse_line() looks at the first character of a line and only tries the
+prefixes that start with it (DISPATCH), so an uninteresting line costs a
+dict lookup and at most a couple of startswith() calls, never a regex. A
+line whose prefix matched goes through its type's anchored regex once.
+Lines are matched at their start. Other lines may be indented, but a PDC
+record must start its line, as in tdma_log's block reader.
+
+The exporter reads its live logs line by line through parse_line(); the
+analysis scripts read PDC records a block at a time with tdma_log, whose
+PDC_BLOCK_RE is built from PDC_RE, so there is one PDC grammar.
+
+open_log() opens a log for reading whatever its compression: archived
+master logs are often gzip'ed (.gz) or zstd'ed (.zst) to save SD card
+space, and are decompressed on the fly, reading the compressed file in
+COMPRESSED_READ_SIZE chunks. zstd needs the optional zstandard package.
+
+Usage (micro-benchmark, lines/s per line type):
+    python3 tdma_lines.py [logfile] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import re
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PDC = "pdc"
+BEACON = "beacon"
+ENQUEUE_DROP = "enqueue_drop"
+ASSOC_SLOTS = "assoc_slots"
+ASSOC_MESSAGE = "assoc_message"
+RSSI_RESULTS = "rssi_results"
+RSSI_DONE = "rssi_done"
+RSSI_CHANNEL = "rssi_channel"
+
+# Temp is signed: the modem reports negative temperatures as such.
+PDC_RE = re.compile(r"PDC[ \t]+([\d.]+)[ \t]+Seq:(\d+)[ \t]+Tx:(\d+)[ \t]+Temp:(-?\d+)")
+BEACON_RE = re.compile(r"Beacon fired:[ \t]*frame_time=([\d.]+)")
+ENQUEUE_DROP_RE = re.compile(r"PDC ENQUEUE DROP count=(\d+) ret=(-?\d+)")
+ASSOC_SLOTS_RE = re.compile(r"Assigned client (\d+) slots \[(-?\d+) \.\. (-?\d+)\]")
+ASSOC_MESSAGE_RE = re.compile(r"Received Association (\w+) message:")
+RSSI_RESULTS_RE = re.compile(r"RSSI scanning results \(meas #(\d+) mdm time (\d+)\)")
+RSSI_DONE_RE = re.compile(r"RSSI scan done\. Found (\d+) free, (\d+) possible and (\d+) busy")
+RSSI_CHANNEL_RE = re.compile(r"Best channel: (\d+)")
+
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+COMPRESSED_READ_SIZE = 1024 * 1024  # compressed bytes per read from storage
+
+
+def is_compressed(path):
+    return str(path).endswith(COMPRESSED_SUFFIXES)
+
+
+def open_log(path):
+    """
+    Open a log for binary reading; a .gz or .zst log is decompressed as it is
+    read. Compressed logs can only be read front to back (no mmap, no tail).
+    """
+    path = str(path)
+    if path.endswith(".gz"):
+        raw = open(path, "rb", buffering=COMPRESSED_READ_SIZE)
+        f = gzip.GzipFile(fileobj=raw, mode="rb")
+        f.myfileobj = raw   # closed with f, as gzip.open() does
+        return f
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"{path}: reading .zst logs needs the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb", buffering=COMPRESSED_READ_SIZE),
+            read_size=COMPRESSED_READ_SIZE, closefd=True)
+    return open(path, "rb")
+
+
+def parse_pdc(line):
+    """(frame_time, seq, tx, temp) of a PDC line, or None for any other line."""
+    # also rejects "PDC received (...)" and a bare "PDC 50860.737052"
+    m = PDC_RE.match(line)
+    if m is None:
+        return None
+    t, seq, tx, temp = m.groups()
+    return float(t), int(seq), int(tx), int(temp)
+
+
+def _fields(regex, *types, find="match"):
+    """Parser for one line type: regex match (or search), then one converter per group."""
+    find = getattr(regex, find)
+
+    def parse(line):
+        m = find(line)
+        if m is None:
+            return None
+        return tuple(conv(g) for conv, g in zip(types, m.groups()))
+    return parse
+
+
+# first character -> (prefix, kind, parser) to try in order (longest prefix first)
+DISPATCH = {
+    "P": (
+        ("PDC ENQUEUE DROP", ENQUEUE_DROP, _fields(ENQUEUE_DROP_RE, int, int)),
+        ("PDC", PDC, parse_pdc),
+    ),
+    "B": (
+        ("Beacon fired:", BEACON, _fields(BEACON_RE, float)),
+        ("Best channel:", RSSI_CHANNEL, _fields(RSSI_CHANNEL_RE, int)),
+    ),
+    "A": (
+        ("Assigned client", ASSOC_SLOTS, _fields(ASSOC_SLOTS_RE, int, int, int)),
+    ),
+    "R": (
+        ("Received Association", ASSOC_MESSAGE, _fields(ASSOC_MESSAGE_RE, str)),
+        ("RSSI scanning results", RSSI_RESULTS, _fields(RSSI_RESULTS_RE, int, int)),
+        ("RSSI scan done.", RSSI_DONE, _fields(RSSI_DONE_RE, int, int, int)),
+    ),
+}
+
+
+def parse_line(line):
+    """
+    Return (kind, fields) for a line of one of the known types, else None.
+    fields is the tuple of the line's values, in the order of the format above.
+    """
+    c = line[:1]
+    indented = c == " " or c == "\t"
+    if indented:
+        line = line.lstrip()    # desh_print() indents some messages
+        c = line[:1]
+    for prefix, kind, parse in DISPATCH.get(c, ()):
+        if line.startswith(prefix):
+            if indented and kind == PDC:
+                return None
+            fields = parse(line)
+            return None if fields is None else (kind, fields)
+    return None
+
+
+# -------------------------------------------------
+# Micro-benchmark
+# -------------------------------------------------
+
+# one sample line per type that the bundled sample log may not contain
+SAMPLE_LINES = {
+    PDC: "PDC 729083.268 Seq:25 Tx:4 Temp:36",
+    BEACON: "Beacon fired: frame_time=729083.268000",
+    ENQUEUE_DROP: "PDC ENQUEUE DROP count=12 ret=-12",
+    ASSOC_SLOTS: "Assigned client 2 slots [6 .. 7]",
+    ASSOC_MESSAGE: "      Received Association Request message:",
+    RSSI_RESULTS: "RSSI scanning results (meas #1 mdm time 6697051702):",
+    RSSI_DONE: " RSSI scan done. Found 1 free, 0 possible and 0 busy channels.",
+    RSSI_CHANNEL: "Best channel: 1677",
+    "other": "  HARQ Process TX:  2 (0x2)",
+}
+
+# what a line cost before: one unanchored search per regex, in turn
+SEARCH_ORDER = [
+    (BEACON, _fields(BEACON_RE, float, find="search")),
+    (ENQUEUE_DROP, _fields(ENQUEUE_DROP_RE, int, int, find="search")),
+    (PDC, _fields(PDC_RE, float, int, int, int, find="search")),
+    (ASSOC_SLOTS, _fields(ASSOC_SLOTS_RE, int, int, int, find="search")),
+    (ASSOC_MESSAGE, _fields(ASSOC_MESSAGE_RE, str, find="search")),
+    (RSSI_RESULTS, _fields(RSSI_RESULTS_RE, int, int, find="search")),
+    (RSSI_DONE, _fields(RSSI_DONE_RE, int, int, int, find="search")),
+    (RSSI_CHANNEL, _fields(RSSI_CHANNEL_RE, int, find="search")),
+]
+
+
+def search_line(line):
+    for kind, parse in SEARCH_ORDER:
+        fields = parse(line)
+        if fields is not None:
+            return kind, fields
+    return None
+
+
+def lines_per_s(parse, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            parse(line)
+    return len(lines) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TDMA log line parser per line type.")
+    parser.add_argument("logfile", nargs="?", default=None,
+                        help="Log whose lines are benchmarked (default: built-in samples)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes per line type (default: 20)")
+    args = parser.parse_args()
+
+    by_kind = {kind: [line] * 5000 for kind, line in SAMPLE_LINES.items()}
+    if args.logfile:
+        with open_log(args.logfile) as f:
+            lines = f.read().decode(errors="replace").splitlines()
+        by_kind = {}
+        for line in lines:
+            parsed = parse_line(line)
+            by_kind.setdefault(parsed[0] if parsed else "other", []).append(line)
+        by_kind["all lines"] = lines
+
+    print(f"{'Line type':<14} {'Lines':>8} {'parse_line/s':>13} {'regex search/s':>15} {'Speed-up':>9}")
+    for kind, lines in by_kind.items():
+        fast = lines_per_s(parse_line, lines, args.repeat)
+        slow = lines_per_s(search_line, lines, args.repeat)
+        print(f"{kind:<14} {len(lines):>8} {fast:>13.0f} {slow:>15.0f} {fast / slow:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+Bulk readers for the master's TDMA log (logs/master_output.txt).
+
+The analysis scripts only care about the consolidated PDC line written by
+dect_stats_log_thread():
+
+    PDC <frame_time> Seq:<seq> Tx:<tx> Temp:<temp>
+
+Instead of matching a regex and building a dict per line, read_pdc() reads
+the log in large blocks and handles each block as a whole: PDC lines are
+picked out with NumPy, the "Seq:"/"Tx:"/"Temp:" labels are stripped with one
+bytes.translate() and the remaining numbers go through pandas' C CSV parser.
+The result is a structured array with compact dtypes (see PDC_DTYPE). That
+fast path only reads the firmware's single-space format; a block with a PDC
+line spaced any other way (tabs, double spaces) is read with PDC_BLOCK_RE,
+so it yields the same records as tdma_lines.PDC_RE line by line.
+
+read_pdc_window() answers "records between t1 and t2 (optionally for one TX)"
+without scanning the whole log: the file is memory-mapped and a sparse
+frame_time -> byte offset index (the first and last PDC line of every
+INDEX_STRIDE bytes, down to the last line of the log) is binary searched to
+find the byte range to parse. The index is built on first use and persisted
+beside the log (<log>.pdcidx.npz). The binary search needs frame_time to only
+go forward, which holds for a single modem run; when a log holds several runs
+(appended after a modem restart) the indexed times go backwards and the whole
+log is parsed and filtered instead.
+
+read_pdc_incremental() is for re-running the tools on a log that is still
+being written: the records parsed so far, the byte offset they end at, the
+file's inode/size and the bytes at its start and just before that offset are
+checkpointed beside the log (<log>.pdcstate.npz), and the next call only
+parses the bytes appended since. A rotated or truncated log (even one that
+has grown past the old offset again) is detected and parsed again from the
+start.
+
+With jobs > 1, read_pdc(), read_pdc_window() and read_pdc_incremental() cut
+the bytes to parse into line-aligned ranges (split_ranges()) and parse them
+in a pool of processes, each returning its records as one PDC_DTYPE array
+(13 bytes per record to send back). The arrays are concatenated in file
+order, so the result is the same as a serial read and a burst that spans two
+ranges is contiguous again before any analysis sees it.
+
+A log compressed with gzip (.gz) or zstd (.zst) is read through
+tdma_lines.open_log(), decompressing as it streams, so an archived log never
+has to be unpacked to disk. Being read front to back only, it is parsed by
+one process, a time window is selected while streaming rather than through
+the index, and read_pdc_incremental() simply reads it whole.
+
+follow_pdc() tails a log that is still being written and yields the PDC
+records appended since the last read, one array per read.
+
+save_frame_cache()/load_frame_cache() keep the tools' parsed DataFrame in a
+columnar cache beside the log (<log>.tdmacache/), keyed by the log's path,
+size and mtime, so a tool that finds a valid cache starts without touching
+the text at all. The cache is Parquet when pyarrow is installed and one .npy
+file per column otherwise, memory-mapped on load.
+
+read_archive() reads the binary archive the exporter writes with --archive
+(a directory of *.pdc segments, each a raw array of PDC_DTYPE records in
+frame_time order), memory-mapping the segments instead of parsing text.
+read_pdc(), read_pdc_window() and read_pdc_incremental() accept such a
+directory in place of a log file, so the tools take either.
+"""
+
+import io
+import json
+import mmap
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tdma_lines import PDC_RE, is_compressed, open_log
+
+try:
+    import pyarrow  # noqa: F401  (only needed for the Parquet cache)
+except ImportError:
+    pyarrow = None
+
+BLOCK_SIZE = 16 * 1024 * 1024   # bytes read per block
+
+# tx_id is a uint16 in the firmware's dect_pdc_stat_entry, so it does not fit
+# in a uint8 once clusters grow past 255 PTs.
+PDC_DTYPE = np.dtype([
+    ("time", np.float64),   # frame_time (ms)
+    ("seq", np.uint16),
+    ("tx", np.uint16),
+    ("temp", np.int8),
+])
+
+# tdma_lines.PDC_RE for bytes, anchored at every line start of a block. Only
+# used when a block does not fit the fast path.
+PDC_BLOCK_RE = re.compile(b"^" + PDC_RE.pattern.encode(), re.M)
+
+# Bytes removed from PDC lines so that only space separated numbers are left:
+# "PDC 729083.268 Seq:25 Tx:4 Temp:36" -> " 729083.268 25 4 36"
+PDC_LABEL_BYTES = b"PDCSeqTxmp:"
+
+INDEX_STRIDE = 1024 * 1024      # bytes of log per sparse index entry
+INDEX_SUFFIX = ".pdcidx.npz"
+INDEX_VERSION = 2               # bump when build_index() changes what it records
+
+CHECKPOINT_SUFFIX = ".pdcstate.npz"
+FINGERPRINT_SIZE = 256          # bytes compared at the start and before the offset to catch a replaced log
+
+CACHE_SUFFIX = ".tdmacache"
+
+ARCHIVE_SUFFIX = ".pdc"         # exporter --archive segment
+
+
+def iter_blocks(path, block_size=BLOCK_SIZE, start=0, partial_tail=True):
+    """
+    Yield the file from byte start in ~block_size chunks, each ending on a
+    line boundary. partial_tail=False drops a last line with no newline yet
+    (one the writer is still in the middle of).
+    """
+    with open_log(path) as f:
+        if start:
+            f.seek(start)
+        tail = b""
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                break
+            chunk = tail + chunk
+            cut = chunk.rfind(b"\n") + 1
+            if cut == 0:
+                # no newline in this chunk yet, keep accumulating
+                tail = chunk
+                continue
+            tail = chunk[cut:]
+            yield chunk[:cut]
+        if tail and partial_tail:
+            yield tail
+
+
+def pdc_lines(buf):
+    """
+    Return the lines of buf that start with "PDC <digit>", joined back
+    together, and whether buf also has PDC lines with other spacing ("PDC\t",
+    "PDC  ", ...) that PDC_BLOCK_RE accepts but the fast path cannot read.
+    """
+    a = np.frombuffer(buf, dtype=np.uint8)
+    nl = np.flatnonzero(a == ord("\n"))
+    line_start = np.concatenate(([0], nl + 1))
+    line_end = np.append(nl + 1, len(a))
+
+    # pad so the fixed-offset prefix check never indexes past the end
+    p = np.concatenate((a, np.zeros(5, dtype=np.uint8)))
+    keep = (
+        (p[line_start] == ord("P")) &
+        (p[line_start + 1] == ord("D")) &
+        (p[line_start + 2] == ord("C")) &
+        (p[line_start + 3] == ord(" ")) &
+        (p[line_start + 4] >= ord("0")) &
+        (p[line_start + 4] <= ord("9"))
+    )
+    pdc = (p[line_start] == ord("P")) & (p[line_start + 1] == ord("D")) & (p[line_start + 2] == ord("C"))
+    c3, c4 = p[line_start + 3], p[line_start + 4]
+    odd = pdc & (
+        (c3 == ord("\t")) |
+        ((c3 == ord(" ")) & ((c4 == ord(" ")) | (c4 == ord("\t")) | (c4 == ord("."))))
+    )
+
+    # copy runs of consecutive PDC lines rather than line by line
+    edges = np.diff(keep.astype(np.int8), prepend=0, append=0)
+    run_first = np.flatnonzero(edges == 1)
+    run_last = np.flatnonzero(edges == -1) - 1
+    lines = b"".join(
+        buf[s:e] for s, e in zip(line_start[run_first], line_end[run_last])
+    )
+    return lines, bool(odd.any())
+
+
+def _extract_pdc_regex(buf):
+    fields = PDC_BLOCK_RE.findall(buf)
+    out = np.empty(len(fields), dtype=PDC_DTYPE)
+    if fields:
+        cols = np.array(fields, dtype="S32")
+        out["time"] = cols[:, 0].astype(np.float64)
+        out["seq"] = cols[:, 1].astype(np.int64)
+        out["tx"] = cols[:, 2].astype(np.int64)
+        out["temp"] = cols[:, 3].astype(np.int64)
+    return out
+
+
+def extract_pdc(buf):
+    """Extract every PDC record in a bytes buffer into a PDC_DTYPE array."""
+    lines, odd = pdc_lines(buf)
+    if odd:
+        return _extract_pdc_regex(buf)
+    text = lines.translate(None, PDC_LABEL_BYTES)
+    if not text:
+        return np.empty(0, dtype=PDC_DTYPE)
+
+    try:
+        cols = pd.read_csv(
+            io.BytesIO(text), sep=" ", header=None, engine="c",
+            usecols=[1, 2, 3, 4], dtype=np.float64, on_bad_lines="skip",
+        ).to_numpy()
+    except ValueError:
+        # something in the block is not a plain number (garbled serial
+        # output, odd spacing...): fall back to the exact regex
+        return _extract_pdc_regex(buf)
+
+    # bare "PDC <time>" lines have no Seq/Tx/Temp and come back as NaN
+    cols = cols[~np.isnan(cols).any(axis=1)]
+    if len(cols) != lines.count(b"Seq:"):
+        # a record dropped as NaN or skipped as a bad line (extra spaces
+        # further along the line...): leave the block to the regex
+        return _extract_pdc_regex(buf)
+
+    out = np.empty(len(cols), dtype=PDC_DTYPE)
+    out["time"] = cols[:, 0]
+    out["seq"] = cols[:, 1]
+    out["tx"] = cols[:, 2]
+    out["temp"] = cols[:, 3]
+    return out
+
+
+def read_pdc(path, block_size=BLOCK_SIZE, jobs=1):
+    """Read every PDC record of a log file (or archive directory), in file order."""
+    if os.path.isdir(path):
+        return read_archive(path)
+    if jobs > 1 and not is_compressed(path):
+        return parse_range(path, 0, os.path.getsize(path), block_size, jobs)
+    parts = [extract_pdc(block) for block in iter_blocks(path, block_size)]
+    if not parts:
+        return np.empty(0, dtype=PDC_DTYPE)
+    return np.concatenate(parts)
+
+
+# -------------------------------------------------
+# Byte ranges, optionally in parallel
+# -------------------------------------------------
+
+def _extract_range(mm, start, end, block_size):
+    parts = []
+    pos = start
+    while pos < end:
+        stop = min(pos + block_size, end)
+        if stop < end:
+            cut = mm.rfind(b"\n", pos, stop) + 1
+            stop = cut if cut > pos else stop
+        parts.append(extract_pdc(mm[pos:stop]))
+        pos = stop
+    return np.concatenate(parts) if parts else np.empty(0, dtype=PDC_DTYPE)
+
+
+def _parse_range_worker(path, start, end, block_size):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _extract_range(mm, start, end, block_size)
+
+
+def split_ranges(path, n, start=0, end=None):
+    """
+    Cut bytes [start, end) of a file into at most n ranges of about equal
+    size, each (but the last) ending just after a newline.
+    """
+    if end is None:
+        end = os.path.getsize(path)
+    bounds = [start]
+    if n > 1 and end > start:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(1, n):
+                pos = max(start + (end - start) * i // n, bounds[-1])
+                cut = mm.find(b"\n", pos, end) + 1
+                if cut == 0:
+                    break
+                if bounds[-1] < cut < end:
+                    bounds.append(cut)
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def parse_range(path, start, end, block_size=BLOCK_SIZE, jobs=1):
+    """
+    PDC records in bytes [start, end) of a log, in file order. With jobs > 1
+    the range is split at line boundaries into a few chunks per process (so
+    an uneven chunk does not leave the others idle) and parsed in a pool.
+    """
+    if end <= start:
+        return np.empty(0, dtype=PDC_DTYPE)
+    n = min(4 * jobs, -(-(end - start) // block_size)) if jobs > 1 else 1
+    if n <= 1:
+        return _parse_range_worker(path, start, end, block_size)
+
+    starts, ends = zip(*split_ranges(path, n, start, end))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # map() hands the results back in submission order, i.e. file order
+        parts = list(pool.map(_parse_range_worker, [path] * len(starts), starts, ends,
+                              [block_size] * len(starts)))
+    return np.concatenate(parts)
+
+
+# -------------------------------------------------
+# Time-range index
+# -------------------------------------------------
+
+def _next_pdc(mm, pos, end):
+    """Return (offset, frame_time) of the first PDC line starting at or after pos."""
+    while pos < end:
+        if mm[pos:pos + 4] == b"PDC ":
+            nl = mm.find(b"\n", pos, end)
+            rec = extract_pdc(mm[pos:end if nl < 0 else nl + 1])
+            if len(rec):
+                return pos, float(rec["time"][0])
+        nl = mm.find(b"\nPDC ", pos, end)
+        if nl < 0:
+            break
+        pos = nl + 1
+    return None
+
+
+def _prev_pdc(mm, start, end):
+    """Return (offset, frame_time) of the last PDC line starting in [start, end)."""
+    pos = end
+    while pos > start:
+        nl = mm.rfind(b"\nPDC ", start, pos)
+        line = nl + 1 if nl >= 0 else start
+        if nl < 0 and mm[start:start + 4] != b"PDC ":
+            break
+        eol = mm.find(b"\n", line, len(mm))
+        rec = extract_pdc(mm[line:len(mm) if eol < 0 else eol + 1])
+        if len(rec):
+            return line, float(rec["time"][0])
+        if nl < 0:
+            break
+        pos = nl
+    return None
+
+
+def build_index(mm, stride=INDEX_STRIDE):
+    """
+    Sparse index of a mapped log: for every stride bytes, the byte offset and
+    frame_time of the first PDC line that follows, and of the last PDC line
+    before the next of those (or before the end of the log), so that a restart
+    of frame_time shows up in the index even in the log's last stride. Only
+    those lines are read.
+    """
+    offsets, times = [], []
+
+    def add(hit):
+        if hit is not None and (not offsets or hit[0] > offsets[-1]):
+            offsets.append(hit[0])
+            times.append(hit[1])
+
+    size = len(mm)
+    pos = 0
+    while pos < size:
+        hit = _next_pdc(mm, pos, size)
+        if hit is None:
+            break
+        if offsets:
+            add(_prev_pdc(mm, offsets[-1], hit[0]))
+        add(hit)
+        pos = max(pos + stride, hit[0] + 1)
+        if pos < size:
+            # realign on the start of the next line
+            nl = mm.find(b"\n", pos - 1)
+            pos = size if nl < 0 else nl + 1
+    if offsets:
+        add(_prev_pdc(mm, offsets[-1], size))
+    return np.array(offsets, dtype=np.int64), np.array(times, dtype=np.float64)
+
+
+def load_index(path, mm=None, stride=INDEX_STRIDE):
+    """
+    Return (offsets, times) for the log at path, reusing the index saved
+    beside it when the log's size and mtime still match, otherwise
+    (re)building and saving it.
+    """
+    st = os.stat(path)
+    idx_path = str(path) + INDEX_SUFFIX
+    try:
+        with np.load(idx_path) as idx:
+            if (int(idx["size"]) == st.st_size and int(idx["mtime_ns"]) == st.st_mtime_ns
+                    and int(idx["stride"]) == stride and int(idx["version"]) == INDEX_VERSION):
+                return idx["offsets"], idx["times"]
+    except (OSError, KeyError, ValueError):
+        pass
+
+    if mm is None:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            offsets, times = build_index(m, stride)
+    else:
+        offsets, times = build_index(mm, stride)
+
+    try:
+        np.savez(idx_path, offsets=offsets, times=times, size=st.st_size,
+                 mtime_ns=st.st_mtime_ns, stride=stride, version=INDEX_VERSION)
+    except OSError:
+        # read-only log directory: the index just lives for this call
+        pass
+    return offsets, times
+
+
+def read_pdc_window(path, t_from=None, t_to=None, tx=None, block_size=BLOCK_SIZE, jobs=1):
+    """
+    Read the PDC records with t_from <= frame_time <= t_to (either bound may be
+    None), optionally only those of one TX, in file order. Only the part of the
+    log the index says can hold that range is read, by jobs processes; all of
+    it if frame_time goes backwards somewhere (several modem runs in one log).
+    """
+    if os.path.isdir(path):
+        return read_archive(path, t_from, t_to, tx)
+    if is_compressed(path):
+        parts = [_select(extract_pdc(block), t_from, t_to, tx) for block in iter_blocks(path, block_size)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=PDC_DTYPE)
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=PDC_DTYPE)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offsets, times = load_index(path, mm)
+
+        start, end = 0, len(mm)
+        if len(offsets) and not (np.diff(times) < 0).any():
+            if t_from is not None:
+                i = np.searchsorted(times, t_from, side="left") - 1
+                start = int(offsets[i]) if i >= 0 else 0
+            if t_to is not None:
+                j = np.searchsorted(times, t_to, side="right")
+                end = int(offsets[j]) if j < len(offsets) else len(mm)
+
+        if jobs <= 1:
+            out = _extract_range(mm, start, end, block_size)
+    if jobs > 1:
+        out = parse_range(path, start, end, block_size, jobs)
+    return _select(out, t_from, t_to, tx)
+
+
+def _select(out, t_from, t_to, tx):
+    """The records of out inside the window (and of tx), in order."""
+    keep = np.ones(len(out), dtype=bool)
+    if t_from is not None:
+        keep &= out["time"] >= t_from
+    if t_to is not None:
+        keep &= out["time"] <= t_to
+    if tx is not None:
+        keep &= out["tx"] == tx
+    return out[keep]
+
+
+def follow_pdc(path, poll_interval=0.2, block_size=BLOCK_SIZE, from_start=True):
+    """
+    Tail a log that is still being written, yielding a PDC_DTYPE array of the
+    records in each batch of complete lines appended. Never returns; stop it by
+    closing the generator. from_start=False skips what is already in the file.
+    """
+    with open(path, "rb") as f:
+        if not from_start:
+            f.seek(0, 2)
+        tail = b""
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                time.sleep(poll_interval)
+                continue
+            chunk = tail + chunk
+            cut = chunk.rfind(b"\n") + 1
+            tail = chunk[cut:]
+            if cut:
+                yield extract_pdc(chunk[:cut])
+
+
+# -------------------------------------------------
+# Incremental re-reads
+# -------------------------------------------------
+
+def _fingerprint(path, start=0, size=FINGERPRINT_SIZE):
+    with open(path, "rb") as f:
+        f.seek(start)
+        return np.frombuffer(f.read(size), dtype=np.uint8)
+
+
+def load_checkpoint(path):
+    """
+    Return (records, offset) from the checkpoint beside path, or (empty, 0)
+    when there is none or the log was rotated/truncated since it was written.
+    Besides the inode and size, the bytes at the start of the log and just
+    before offset must be unchanged: a copytruncate'd log that has grown past
+    the old offset again keeps its inode and looks like an append otherwise.
+    """
+    empty = (np.empty(0, dtype=PDC_DTYPE), 0)
+    try:
+        st = os.stat(path)
+        with np.load(str(path) + CHECKPOINT_SUFFIX) as ck:
+            offset = int(ck["offset"])
+            # a different inode or a shrunk file means rotation/truncation
+            if int(ck["inode"]) != st.st_ino or int(ck["size"]) > st.st_size:
+                return empty
+            head, tail = ck["head"], ck["tail"]
+            if not np.array_equal(head, _fingerprint(path, 0, len(head))):
+                return empty
+            if not np.array_equal(tail, _fingerprint(path, offset - len(tail), len(tail))):
+                return empty
+            return ck["records"].astype(PDC_DTYPE), offset
+    except (OSError, KeyError, ValueError):
+        return empty
+
+
+def save_checkpoint(path, records, offset):
+    st = os.stat(path)
+    ck_path = str(path) + CHECKPOINT_SUFFIX
+    tmp = ck_path + ".tmp.npz"
+    try:
+        n = min(offset, FINGERPRINT_SIZE)
+        np.savez(tmp, records=records, offset=offset, inode=st.st_ino, size=st.st_size,
+                 head=_fingerprint(path, 0, n), tail=_fingerprint(path, offset - n, n))
+        os.replace(tmp, ck_path)
+    except OSError:
+        pass
+
+
+def _complete_lines_end(path, start):
+    """Offset just after the last newline at or beyond start (start if there is none)."""
+    if os.path.getsize(path) <= start:
+        return start
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return max(start, mm.rfind(b"\n", start) + 1)
+
+
+def read_pdc_incremental(path, block_size=BLOCK_SIZE, resume=True, jobs=1):
+    """
+    Like read_pdc(), but only parses what was appended since the last call and
+    merges it with the checkpointed records. resume=False ignores the
+    checkpoint and reparses from byte zero (the checkpoint is rewritten).
+    An archive directory or a compressed log needs no checkpoint (neither is
+    appended to) and is simply read whole.
+    """
+    if os.path.isdir(path):
+        return read_archive(path)
+    if is_compressed(path):
+        return read_pdc(path, block_size)
+    records, offset = load_checkpoint(path) if resume else (np.empty(0, dtype=PDC_DTYPE), 0)
+
+    parts = [records]
+    if jobs > 1:
+        end = _complete_lines_end(path, offset)
+        if end > offset:
+            parts.append(parse_range(path, offset, end, block_size, jobs))
+            offset = end
+    else:
+        for block in iter_blocks(path, block_size, start=offset, partial_tail=False):
+            parts.append(extract_pdc(block))
+            offset += len(block)
+
+    if len(parts) > 1:
+        records = np.concatenate(parts)
+        save_checkpoint(path, records, offset)
+    elif not resume:
+        save_checkpoint(path, records, offset)
+    return records
+
+
+# -------------------------------------------------
+# Columnar frame cache
+# -------------------------------------------------
+
+def cache_key(log_path):
+    """Identity of the log the cache was built from, or None if it does not exist."""
+    try:
+        if os.path.isdir(log_path):
+            # an archive grows by appending to its segments, not to the directory
+            stats = [p.stat() for p in archive_segments(log_path)]
+            return {"log": os.path.abspath(log_path),
+                    "size": sum(st.st_size for st in stats),
+                    "mtime_ns": max((st.st_mtime_ns for st in stats), default=0)}
+        st = os.stat(log_path)
+    except OSError:
+        return None
+    return {"log": os.path.abspath(log_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def save_frame_cache(log_path, df, key=None):
+    """
+    Store df as the cache of log_path. Pass the cache_key() taken before the
+    log was parsed so that lines appended meanwhile invalidate the cache.
+    """
+    key = key or cache_key(log_path)
+    if key is None:
+        return False
+
+    d = Path(str(log_path) + CACHE_SUFFIX)
+    meta = dict(key, columns=list(df.columns))
+    try:
+        d.mkdir(exist_ok=True)
+        if pyarrow is not None:
+            df.to_parquet(d / "frame.parquet", index=False)
+            meta["format"] = "parquet"
+        else:
+            for col in df.columns:
+                np.save(d / f"{col}.npy", df[col].to_numpy())
+            meta["format"] = "npy"
+        # meta.json is written last: it is what marks the cache as complete
+        tmp = d / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, d / "meta.json")
+    except OSError:
+        return False
+    return True
+
+
+def load_frame_cache(log_path):
+    """Return the cached DataFrame for log_path, or None if it is missing or stale."""
+    d = Path(str(log_path) + CACHE_SUFFIX)
+    try:
+        meta = json.loads((d / "meta.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+    key = cache_key(log_path)
+    if key is None or any(meta.get(k) != v for k, v in key.items()):
+        return None
+
+    try:
+        if meta.get("format") == "parquet":
+            if pyarrow is None:
+                return None
+            return pd.read_parquet(d / "frame.parquet", memory_map=True)
+        return pd.DataFrame({
+            col: np.load(d / f"{col}.npy", mmap_mode="r") for col in meta["columns"]
+        })
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# -------------------------------------------------
+# Exporter archive
+# -------------------------------------------------
+
+def archive_segments(directory):
+    """The segments of an exporter archive, oldest first (names are UTC start times)."""
+    return sorted(Path(directory).glob("*" + ARCHIVE_SUFFIX))
+
+
+def _map_segment(path):
+    # a segment being appended to may end in a partial record; leave it out
+    n = os.path.getsize(path) // PDC_DTYPE.itemsize
+    if n == 0:
+        return np.empty(0, dtype=PDC_DTYPE)
+    return np.memmap(path, dtype=PDC_DTYPE, mode="r", shape=(n,))
+
+
+def read_archive(directory, t_from=None, t_to=None, tx=None):
+    """
+    Read the records of an exporter archive with t_from <= frame_time <= t_to
+    (either bound may be None), optionally only those of one TX. Segments
+    whose first and last records fall outside the range are not read; within
+    a segment the range is binary searched.
+    """
+    parts = []
+    for path in archive_segments(directory):
+        seg = _map_segment(path)
+        if len(seg) == 0:
+            continue
+        times = seg["time"]
+        if (t_from is not None and times[-1] < t_from) or (t_to is not None and times[0] > t_to):
+            continue
+        lo = np.searchsorted(times, t_from, side="left") if t_from is not None else 0
+        hi = np.searchsorted(times, t_to, side="right") if t_to is not None else len(seg)
+        part = np.array(seg[lo:hi])
+        if tx is not None:
+            part = part[part["tx"] == tx]
+        parts.append(part)
+    if not parts:
+        return np.empty(0, dtype=PDC_DTYPE)
+    return np.concatenate(parts)
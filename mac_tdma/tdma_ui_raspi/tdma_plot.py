@@ -3,32 +3,35 @@ import matplotlib.pyplot as plt
 import re
 import numpy as np
 
+from tdma_log import load_frame_cache
+
 # ---- CONFIG ----
+MASTER_LOG_FILE = "logs/master_output.txt"
 CSV_FILE = "tdma.csv"
 
 
-TICKS_TO_MS = 1 / 69120  # exact
-
-
 # ---- LOAD TX DATA ----
-df = pd.read_csv(CSV_FILE)
+# records cached by parse_and_plot.py (frame_time already in ms); a CSV
+# exported with parse_and_plot.py --csv is the fallback
+df = load_frame_cache(MASTER_LOG_FILE)
+if df is None:
+    df = pd.read_csv(CSV_FILE)
 df = df.sort_values("frame_time")
 
 # Separate beacons from PDC data
-pdc_df = df[df['reset'] != 'beacon'].copy()
-beacon_df = df[df['reset'] == 'beacon'].copy()
+pdc_df = df[df['beacon'] == False].copy()
+beacon_df = df[df['beacon'] == True].copy()
 
 t0 = pdc_df["frame_time"].min()
-pdc_df["time_ms"] = (pdc_df["frame_time"] - t0) * TICKS_TO_MS
+pdc_df["time_ms"] = pdc_df["frame_time"] - t0
 
 # ---- PARSE BEACONS ----
 beacon_ticks = []
 
-# Extract beacons from CSV (rows with reset='beacon')
-beacon_rows = df[df['reset'] == 'beacon']
-beacon_ticks = beacon_rows['frame_time'].tolist()
+# Extract beacons (rows with beacon=True)
+beacon_ticks = beacon_df['frame_time'].tolist()
 
-beacon_ms = [(t - t0) * TICKS_TO_MS for t in beacon_ticks]
+beacon_ms = [t - t0 for t in beacon_ticks]
 
 # ---- COLOR MAP (deterministic) ----
 tx_ids = sorted(pdc_df["tx_id"].unique())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Mergeable inter-packet interval and jitter statistics for TDMA logs.
+
+Exact percentiles over every interval of a long run need every interval in
+memory. DDSketch instead keeps one counter per logarithmic bucket: any
+quantile comes back within RELATIVE_ACCURACY of the true value, memory only
+depends on the range of values (a few hundred buckets for 0.001 ms - 1 h),
+and two sketches merge by adding their counters, so sketches saved from
+separate log files combine into one fleet-wide distribution.
+
+IntervalStats keeps, per TX, a sketch of the intervals between consecutive
+packets of the same burst and a sketch of their jitter (distance from the
+nearest whole number of slot periods), plus one sketch for the burst each
+TX is currently in, which is reported and dropped when the burst ends.
+
+Usage (merge sketches saved with distances.py --sketch-out):
+    python3 tdma_sketch.py run1.json run2.json ...
+"""
+
+import argparse
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE_MS = 1e-3         # smaller values are counted as zero
+QUANTILES = (0.50, 0.95, 0.99)
+PERIOD_MS = 40.0
+
+
+class DDSketch:
+    """Quantile sketch with relative-error guarantees (Masson et al., VLDB 2019)."""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}          # bucket index -> count
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        """Add an array of non-negative values."""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        small = values < MIN_VALUE_MS
+        self.zero_count += int(small.sum())
+        keys = np.ceil(np.log(values[~small]) / self._log_gamma).astype(np.int64)
+        for k, c in zip(*(a.tolist() for a in np.unique(keys, return_counts=True))):
+            self.bins[k] = self.bins.get(k, 0) + c
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        for k, c in other.bins.items():
+            self.bins[k] = self.bins.get(k, 0) + c
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for k in sorted(self.bins):
+            seen += self.bins[k]
+            if seen > rank:
+                value = 2 * self.gamma ** k / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    def to_dict(self):
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": [[k, c] for k, c in sorted(self.bins.items())],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["relative_accuracy"])
+        s.bins = {int(k): int(c) for k, c in d["bins"]}
+        s.zero_count = d["zero_count"]
+        s.count = d["count"]
+        s.sum = d["sum"]
+        s.min = d["min"] if d["min"] is not None else math.inf
+        s.max = d["max"] if d["max"] is not None else -math.inf
+        return s
+
+
+def jitter(intervals, period=PERIOD_MS):
+    """Distance of each interval from the nearest whole number (>= 1) of periods."""
+    k = np.maximum(np.rint(intervals / period), 1)
+    return np.abs(intervals - k * period)
+
+
+class IntervalStats:
+    """
+    Per-TX interval/jitter sketches, fed with PDC records in log order.
+
+    Only intervals between consecutive packets of the same burst (same TX and
+    Seq) are counted; the gap into a new burst is not an inter-packet
+    interval. on_burst(tx, seq, sketch) receives each finished burst's jitter
+    sketch. State is a handful of sketches per TX, whatever the run length.
+    """
+
+    def __init__(self, period=PERIOD_MS, on_burst=None):
+        self.period = period
+        self.on_burst = on_burst or (lambda tx, seq, sketch: None)
+        self.interval = {}      # tx -> DDSketch of intervals (ms)
+        self.jitter = {}        # tx -> DDSketch of jitter (ms)
+        self.last = {}          # tx -> (seq, frame_time) of its latest packet
+        self.burst = {}         # tx -> jitter DDSketch of its current burst
+
+    def feed(self, records):
+        tx_all = records["tx"]
+        for tx in np.unique(tx_all).tolist():
+            mine = records[tx_all == tx]
+            seq = mine["seq"].astype(np.int64)
+            t = mine["time"]
+            prev = self.last.get(tx)
+            if prev is not None:
+                seq = np.concatenate(([prev[0]], seq))
+                t = np.concatenate(([prev[1]], t))
+            self.last[tx] = (int(seq[-1]), float(t[-1]))
+
+            same = seq[1:] == seq[:-1]
+            d = np.diff(t)
+            self.interval.setdefault(tx, DDSketch()).add(d[same])
+            j = jitter(d, self.period)
+            self.jitter.setdefault(tx, DDSketch()).add(j[same])
+
+            # per-burst sketches: split this chunk's intervals at Seq changes
+            # (a run starting at 0 continues the burst open from the last chunk)
+            starts = np.concatenate(([0], np.flatnonzero(~same) + 1))
+            for lo, hi in zip(starts.tolist(), np.append(starts[1:], len(seq)).tolist()):
+                if lo > 0 or prev is None:
+                    self._end_burst(tx)
+                    self.burst[tx] = (int(seq[lo]), DDSketch())
+                # intervals lo..hi-2 are between packets of this run
+                self.burst[tx][1].add(j[lo:hi - 1])
+
+    def _end_burst(self, tx):
+        cur = self.burst.pop(tx, None)
+        if cur is not None:
+            self.on_burst(tx, cur[0], cur[1])
+
+    def finish(self):
+        """Report every burst still open."""
+        for tx in list(self.burst):
+            self._end_burst(tx)
+
+    def merge(self, other):
+        for tx, s in other.interval.items():
+            self.interval.setdefault(tx, DDSketch()).merge(s)
+        for tx, s in other.jitter.items():
+            self.jitter.setdefault(tx, DDSketch()).merge(s)
+        return self
+
+    def report(self):
+        """DataFrame of interval and jitter mean/p50/p95/p99 per TX, plus an 'all' row."""
+        rows = {}
+        fleet_i, fleet_j = DDSketch(), DDSketch()
+        for tx in sorted(self.interval):
+            rows[tx] = _summary(self.interval[tx], self.jitter[tx])
+            fleet_i.merge(self.interval[tx])
+            fleet_j.merge(self.jitter[tx])
+        rows["all"] = _summary(fleet_i, fleet_j)
+        return pd.DataFrame.from_dict(rows, orient="index")
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "period": self.period,
+                "tx": {str(tx): {"interval": self.interval[tx].to_dict(),
+                                 "jitter": self.jitter[tx].to_dict()}
+                       for tx in self.interval},
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            d = json.load(f)
+        stats = cls(d["period"])
+        for tx, s in d["tx"].items():
+            stats.interval[int(tx)] = DDSketch.from_dict(s["interval"])
+            stats.jitter[int(tx)] = DDSketch.from_dict(s["jitter"])
+        return stats
+
+
+def _summary(interval, jitter_sketch):
+    row = {"intervals": interval.count, "interval_mean_ms": round(interval.mean, 3)}
+    for q in QUANTILES:
+        row[f"interval_p{round(q * 100)}_ms"] = round(interval.quantile(q), 3)
+    for q in QUANTILES:
+        row[f"jitter_p{round(q * 100)}_ms"] = round(jitter_sketch.quantile(q), 3)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge saved interval sketches into one fleet-wide report.")
+    parser.add_argument("sketches", nargs="+", help="Sketch files written by distances.py --sketch-out")
+    args = parser.parse_args()
+
+    stats = IntervalStats.load(args.sketches[0])
+    for path in args.sketches[1:]:
+        stats.merge(IntervalStats.load(path))
+    print(stats.report().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution tile pyramid of per-TX event counts and loss markers.
+
+The Electron UI can only show the static tdma_timeline.png; zooming means
+re-plotting the raw log. This builds, next to it, a pyramid the UI can page
+through: for every level in LEVELS_MS (1 ms ... 1 h per bin) the time axis
+(raw frame_time, ms) is cut into tiles of TILE_BINS bins, and each tile holds,
+per TX, how many PDC packets and how many missing slots (from
+metrics.OnlineDetector) fall in each bin. Any zoom window maps to a handful
+of tiles of the level whose bin is closest to one screen pixel.
+
+Layout (under --out, default tiles/):
+    index.json              levels, bin sizes, TILE_BINS, TX ids, time range
+    L<bin_ms>/<tile>.bin    one tile, little-endian:
+        header  "TDMT" u8 version, u32 bin_ms, i64 tile, u16 bins, u16 n_tx
+        per TX  u16 tx, u16 nnz, u16 bin[nnz], u32 events[nnz], u32 missing[nnz]
+    state.pkl               log offset/inode and detector state for resuming
+
+Only non-empty bins are stored, so fine levels stay small. The build is
+incremental: each run parses only the bytes appended since the last one,
+and --follow keeps the pyramid current while the log grows. Tiles hold
+full totals, so they are only valid together with the state saved after
+them: every flush writes the tiles and then state.pkl inside a "flushing"
+marker (Ctrl-C waits for it). A build that finds the marker left behind, or
+no usable state, removes the pyramid and starts again from the top of the
+log instead of adding the same packets twice.
+
+Usage:
+    python3 tdma_tiles.py [logfile] [--out tiles] [--follow]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import signal
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+from metrics import OnlineDetector
+from tdma_lines import is_compressed
+from tdma_log import extract_pdc, iter_blocks
+
+LEVELS_MS = [1, 10, 100, 1000, 10_000, 60_000, 600_000, 3_600_000]
+TILE_BINS = 1024
+TILE_MAGIC = b"TDMT"
+TILE_VERSION = 1
+TILE_HEADER = struct.Struct("<4sBIqHH")
+# Tiles ending this long before the newest packet are written and dropped
+# from memory; missing-slot markers arrive up to one burst window late.
+CLOSE_LAG_MS = 2 * OnlineDetector.WINDOW_MS
+FLUSH_INTERVAL_S = 2.0          # --follow: how often open tiles are written
+BUILD_BLOCK_SIZE = 1024 * 1024  # log bytes per batch (bounds the tiles open at once)
+
+
+def tile_path(out, bin_ms, tile):
+    return Path(out) / f"L{bin_ms}" / f"{tile}.bin"
+
+
+def write_tile(path, bin_ms, tile, counts):
+    """counts: tx -> (events, missing), each a uint32 array of TILE_BINS."""
+    parts = []
+    for tx in sorted(counts):
+        events, missing = counts[tx]
+        nz = np.flatnonzero(events | missing)
+        if len(nz) == 0:
+            continue
+        parts.append(struct.pack("<HH", tx, len(nz)))
+        parts.append(nz.astype("<u2").tobytes())
+        parts.append(events[nz].astype("<u4").tobytes())
+        parts.append(missing[nz].astype("<u4").tobytes())
+    n_tx = len(parts) // 4
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(TILE_HEADER.pack(TILE_MAGIC, TILE_VERSION, bin_ms, tile, TILE_BINS, n_tx))
+        f.write(b"".join(parts))
+    os.replace(tmp, path)
+
+
+def read_tile(path):
+    """Decode a tile file into (bin_ms, tile, {tx: (events, missing)}) with dense arrays."""
+    buf = Path(path).read_bytes()
+    magic, version, bin_ms, tile, bins, n_tx = TILE_HEADER.unpack_from(buf, 0)
+    if magic != TILE_MAGIC or version != TILE_VERSION:
+        raise ValueError(f"{path}: not a TDMA tile")
+    pos = TILE_HEADER.size
+    counts = {}
+    for _ in range(n_tx):
+        tx, nnz = struct.unpack_from("<HH", buf, pos)
+        pos += 4
+        idx = np.frombuffer(buf, "<u2", nnz, pos)
+        pos += 2 * nnz
+        ev = np.frombuffer(buf, "<u4", nnz, pos)
+        pos += 4 * nnz
+        ms = np.frombuffer(buf, "<u4", nnz, pos)
+        pos += 4 * nnz
+        events = np.zeros(bins, dtype=np.uint32)
+        missing = np.zeros(bins, dtype=np.uint32)
+        events[idx] = ev
+        missing[idx] = ms
+        counts[tx] = (events, missing)
+    return bin_ms, tile, counts
+
+
+class TilePyramid:
+    """
+    Accumulates packets and missing slots into the pyramid under out.
+
+    Tiles being filled are held in memory with their full totals (an existing
+    tile file is loaded the first time it is touched again) and written on
+    flush(); tiles that end CLOSE_LAG_MS before the newest packet are also
+    dropped from memory, so memory stays bounded on a never-ending log.
+    """
+
+    def __init__(self, out):
+        self.out = Path(out)
+        self.open = {}          # (bin_ms, tile) -> {tx: (events, missing)}
+        self.dirty = set()
+        self.tx_ids = set()
+        self.t_min = None
+        self.t_max = None
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            idx = json.loads((self.out / "index.json").read_text())
+        except (OSError, ValueError):
+            return
+        self.tx_ids = set(idx.get("tx", []))
+        self.t_min = idx.get("t_min")
+        self.t_max = idx.get("t_max")
+
+    def _tile(self, bin_ms, tile):
+        key = (bin_ms, tile)
+        counts = self.open.get(key)
+        if counts is None:
+            path = tile_path(self.out, bin_ms, tile)
+            counts = read_tile(path)[2] if path.exists() else {}
+            counts = {tx: (ev.copy(), ms.copy()) for tx, (ev, ms) in counts.items()}
+            self.open[key] = counts
+        return counts
+
+    def add(self, times, tx, column):
+        """Count events (column 0) or missing slots (column 1) at times for TXs tx."""
+        if len(times) == 0:
+            return
+        times = np.asarray(times, dtype=np.float64)
+        tx = np.asarray(tx, dtype=np.int64)
+        self.tx_ids.update(np.unique(tx).tolist())
+        lo, hi = float(times.min()), float(times.max())
+        self.t_min = lo if self.t_min is None else min(self.t_min, lo)
+        self.t_max = hi if self.t_max is None else max(self.t_max, hi)
+
+        for bin_ms in LEVELS_MS:
+            b = np.floor(times / bin_ms).astype(np.int64)
+            tile, col = np.divmod(b, TILE_BINS)
+            # one bincount per (tile, tx) group
+            order = np.lexsort((tx, tile))
+            tile_s, tx_s, col_s = tile[order], tx[order], col[order]
+            starts = np.flatnonzero(np.concatenate(
+                ([True], (tile_s[1:] != tile_s[:-1]) | (tx_s[1:] != tx_s[:-1]))))
+            ends = np.append(starts[1:], len(order))
+            for lo, hi in zip(starts.tolist(), ends.tolist()):
+                t_idx, t_tx = int(tile_s[lo]), int(tx_s[lo])
+                counts = self._tile(bin_ms, t_idx)
+                if t_tx not in counts:
+                    counts[t_tx] = (np.zeros(TILE_BINS, np.uint32), np.zeros(TILE_BINS, np.uint32))
+                counts[t_tx][column][:] += np.bincount(col_s[lo:hi], minlength=TILE_BINS).astype(np.uint32)
+                self.dirty.add((bin_ms, t_idx))
+
+    def flush(self, now=None):
+        """Write every dirty tile; drop closed tiles (ending before now - CLOSE_LAG_MS)."""
+        for key in self.dirty:
+            write_tile(tile_path(self.out, *key), key[0], key[1], self.open[key])
+        self.dirty.clear()
+
+        if now is not None:
+            for key in [k for k in self.open
+                        if (k[1] + 1) * TILE_BINS * k[0] < now - CLOSE_LAG_MS]:
+                del self.open[key]
+
+        self.out.mkdir(parents=True, exist_ok=True)
+        (self.out / "index.json").write_text(json.dumps({
+            "levels_ms": LEVELS_MS,
+            "tile_bins": TILE_BINS,
+            "tx": sorted(self.tx_ids),
+            "t_min": self.t_min,
+            "t_max": self.t_max,
+        }))
+
+
+def load_state(out, log_file):
+    """Return (offset, detector attributes) to resume from, or (0, None)."""
+    if (Path(out) / "flushing").exists():
+        return 0, None      # a flush was cut short: tiles and state disagree
+    try:
+        with open(Path(out) / "state.pkl", "rb") as f:
+            state = pickle.load(f)
+        st = os.stat(log_file)
+        if state["inode"] == st.st_ino and state["offset"] <= st.st_size:
+            return state["offset"], state["detector"]
+    except (OSError, KeyError, pickle.UnpicklingError, EOFError):
+        pass
+    return 0, None
+
+
+def save_state(out, log_file, offset, detector):
+    state = {
+        "inode": os.stat(log_file).st_ino,
+        "offset": offset,
+        "detector": {k: getattr(detector, k) for k in ("open", "last_closed", "now")},
+    }
+    tmp = Path(out) / "state.pkl.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp, Path(out) / "state.pkl")
+
+
+def reset(out):
+    """Remove a pyramid (tiles, index, state) that cannot be resumed."""
+    out = Path(out)
+    for bin_ms in LEVELS_MS:
+        shutil.rmtree(out / f"L{bin_ms}", ignore_errors=True)
+    for name in ("index.json", "state.pkl", "flushing"):
+        try:
+            (out / name).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def commit(pyramid, out, log_file, offset, detector):
+    """Write the dirty tiles and then the state they match, as one step."""
+    marker = Path(out) / "flushing"
+    handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+        pyramid.flush(detector.now)
+        save_state(out, log_file, offset, detector)
+        marker.unlink()
+    finally:
+        signal.signal(signal.SIGINT, handler)
+
+
+def build(log_file, out, follow=False, poll_interval=0.2):
+    """Bring the pyramid up to date with the log (and keep it so with follow)."""
+    missing = []
+    detector = OnlineDetector(on_missing=missing.append)
+
+    offset, saved = load_state(out, log_file)
+    if saved is None:
+        reset(out)
+        offset = 0
+    else:
+        for k, v in saved.items():
+            setattr(detector, k, v)
+    pyramid = TilePyramid(out)
+
+    def ingest(records):
+        pyramid.add(records["time"], records["tx"], 0)
+        detector.feed(records)
+        if missing:
+            pyramid.add([m["expected_time"] for m in missing], [m["tx"] for m in missing], 1)
+            missing.clear()
+
+    for block in iter_blocks(log_file, BUILD_BLOCK_SIZE, start=offset, partial_tail=False):
+        ingest(extract_pdc(block))
+        offset += len(block)
+        commit(pyramid, out, log_file, offset, detector)
+    commit(pyramid, out, log_file, offset, detector)
+    if not follow:
+        return pyramid
+
+    print(f"Following {log_file} (Ctrl-C to stop)")
+    last_flush = time.monotonic()
+    try:
+        with open(log_file, "rb") as f:
+            f.seek(offset)
+            tail = b""
+            while True:
+                chunk = f.read(1 << 20)
+                if chunk:
+                    chunk = tail + chunk
+                    cut = chunk.rfind(b"\n") + 1
+                    tail = chunk[cut:]
+                    if cut:
+                        ingest(extract_pdc(chunk[:cut]))
+                        offset += cut
+                else:
+                    time.sleep(poll_interval)
+                if time.monotonic() - last_flush >= FLUSH_INTERVAL_S:
+                    commit(pyramid, out, log_file, offset, detector)
+                    last_flush = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    commit(pyramid, out, log_file, offset, detector)
+    return pyramid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the multi-resolution TDMA tile pyramid.")
+    parser.add_argument("logfile", nargs="?", default="logs/master_output.txt")
+    parser.add_argument("--out", default="tiles", help="Pyramid directory (default: tiles)")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep updating the pyramid as the log grows")
+    args = parser.parse_args()
+    if args.follow and is_compressed(args.logfile):
+        parser.error("--follow needs the text log, not a compressed log")
+
+    pyramid = build(args.logfile, args.out, args.follow)
+    print(f"Tile pyramid in {args.out}: levels {LEVELS_MS} ms/bin, "
+          f"{len(pyramid.tx_ids)} TX(s), frame_time {pyramid.t_min} .. {pyramid.t_max}")
+
+
+if __name__ == "__main__":
+    main()